@@ -0,0 +1,61 @@
+"""Times comp62521.statistics.average against the list based functions it
+replaced, on a million small integers like the per-author counts.
+
+    python benchmark_average.py [size]
+"""
+from comp62521.statistics import average
+import sys
+import time
+import numpy as np
+
+def list_mean(X):
+    n = len(X)
+    if n > 0:
+        return float(sum(X)) / float(len(X))
+    return 0
+
+def list_median(X):
+    n = len(X)
+    if n == 0:
+        return 0
+    L = sorted(X)
+    if n % 2:
+        return L[n / 2]
+    return list_mean(L[(n / 2) - 1:(n / 2) + 1])
+
+def list_mode(X):
+    d = {}
+    for item in X:
+        if d.has_key(item):
+            d[item] += 1
+        else:
+            d[item] = 1
+    m = []
+    for key in d.keys():
+        if m == [] or d[key] > d[m[0]]:
+            m = [key]
+        elif d[key] == d[m[0]]:
+            m.append(key)
+    return m
+
+def best(func, X, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        result = func(X)
+        times.append(time.time() - start)
+    return min(times), result
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    X = np.random.RandomState(0).geometric(0.3, size)
+    L = X.tolist()
+    print "%-8s %12s %12s %8s" % ("", "lists (ms)", "numpy (ms)", "speedup")
+    for name, old, new in [ ("mean", list_mean, average.mean),
+            ("median", list_median, average.median),
+            ("mode", list_mode, average.mode) ]:
+        old_time, old_result = best(old, L)
+        new_time, new_result = best(new, X)
+        assert old_result == new_result
+        print "%-8s %12.1f %12.1f %7.0fx" % (name, old_time * 1000,
+            new_time * 1000, old_time / new_time)
@@ -0,0 +1,43 @@
+import numpy as np
+
+# number of bits set in every byte
+POPCOUNT = np.array([ bin(i).count("1") for i in range(256) ], dtype=np.uint8)
+
+class AuthorSet:
+    """Set of author ids out of size, as a bitmap packed eight ids to a
+    byte, so unions are a bitwise or and cardinality a table lookup."""
+
+    def __init__(self, bits, size):
+        self.bits = bits
+        self.size = size
+
+    @classmethod
+    def empty(cls, size):
+        return cls(np.zeros((size + 7) // 8, dtype=np.uint8), size)
+
+    @classmethod
+    def from_ids(cls, ids, size):
+        """The set of the given ids, which must be sorted."""
+        s = cls.empty(size)
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids):
+            byte = ids >> 3
+            # sorted ids sharing a byte are adjacent; or their bits together
+            starts = np.flatnonzero(np.r_[True, byte[1:] != byte[:-1]])
+            bits = (np.uint8(128) >> (ids & 7).astype(np.uint8)).astype(np.uint8)
+            s.bits[byte[starts]] = np.bitwise_or.reduceat(bits, starts)
+        return s
+
+    @classmethod
+    def union(cls, sets, size):
+        s = cls.empty(size)
+        for other in sets:
+            s |= other
+        return s
+
+    def __ior__(self, other):
+        np.bitwise_or(self.bits, other.bits, out=self.bits)
+        return self
+
+    def __len__(self):
+        return int(POPCOUNT[self.bits].sum(dtype=np.int64))
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+import functools
+import inspect
+import itertools
+import sys
+import threading
+import numpy as np
+
+# bytes of results kept by default
+DEFAULT_BUDGET = 64 << 20
+# items of a container looked at to size it
+SAMPLE = 256
+
+def footprint(value, limit=None):
+    """Rough size in bytes of a result: the value and everything in the
+    lists, tuples, sets and dicts it is made of, and the data of any
+    numpy array in it.
+
+    Containers of more than SAMPLE items are sized from SAMPLE of them,
+    spread over the whole, so large results cost no more to size than
+    small ones. Once the size passes limit the rest is not looked at, and
+    the size so far is returned."""
+    size = 0
+    stack = [(value, 1.0)]
+    while stack:
+        v, weight = stack.pop()
+        size += weight * sys.getsizeof(v)
+        if isinstance(v, np.ndarray):
+            # a view holds no data of its own, but keeps its base alive
+            if v.base is not None:
+                size += weight * v.nbytes
+            continue
+        if isinstance(v, dict):
+            items = itertools.chain.from_iterable(v.iteritems())
+            n = 2 * len(v)
+        elif isinstance(v, (list, tuple)):
+            items = v[::max(len(v) // SAMPLE, 1)]
+            n = len(v)
+        elif isinstance(v, (set, frozenset)):
+            items = v
+            n = len(v)
+        else:
+            n = 0
+        if n:
+            items = list(itertools.islice(items, SAMPLE))
+            stack.extend((item, weight * n / len(items)) for item in items)
+        if limit is not None and size > limit:
+            break
+    return int(size)
+
+class ResultCache:
+    """Results of queries on one version of the data, least recently used
+    first, holding at most budget bytes of them.
+
+    Every result is dropped as soon as one is asked for on another
+    version."""
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self.version = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.used = 0
+
+    def holds(self, key, version):
+        """Whether the result for key on version is in the cache."""
+        with self.lock:
+            return version == self.version and key in self.entries
+
+    def get(self, key, version, compute):
+        """The result of compute() for key on version, from the cache if it
+        is there. key must be hashable."""
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.used = 0
+                self.version = version
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.entries[key] = entry
+                return entry[0]
+
+        value = compute()
+        size = footprint(value, self.budget)
+        with self.lock:
+            if version != self.version or size > self.budget:
+                return value
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.used -= old[1]
+            self.entries[key] = (value, size)
+            self.used += size
+            while self.used > self.budget:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.used -= evicted
+        return value
+
+def cached(method):
+    """Keep the results of a Database query method in its ResultCache,
+    keyed by the method, its arguments and the version of the data.
+    Arguments are matched by name with defaults filled in, so calls that
+    spell them differently share a result. Calls with unhashable
+    arguments are not cached. Results are shared, so callers must not
+    change them. The key of a call is given by the cache_key attribute of
+    the method."""
+    name = method.__name__
+    first = inspect.getargspec(method).args[0]
+
+    def cache_key(self, *args, **kwargs):
+        bound = inspect.getcallargs(method, self, *args, **kwargs)
+        del bound[first]
+        return (name, tuple(sorted(bound.items())))
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = cache_key(self, *args, **kwargs)
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        return self.results.get(key, self.version,
+            lambda: method(self, *args, **kwargs))
+    wrapper.cache_key = cache_key
+    return wrapper
@@ -0,0 +1,166 @@
+import numpy as np
+
+class PublicationColumns:
+    """Columnar store of publications.
+
+    pub_type and year are typed arrays with one entry per publication and
+    authorship is kept CSR style: the author ids of publication i are
+    author_ids[offsets[i]:offsets[i + 1]]. The arrays over-allocate and
+    double when full, so appending is amortised O(1). Titles and keys are
+    only needed for display and deduplication and stay in plain lists, or
+    packed in the snapshot they were loaded from."""
+    INITIAL_SIZE = 1024
+
+    def __init__(self):
+        self.count = 0
+        self.authorships = 0
+        self._pub_type = np.zeros(self.INITIAL_SIZE, dtype=np.int8)
+        self._year = np.zeros(self.INITIAL_SIZE, dtype=np.int32)
+        self._offsets = np.zeros(self.INITIAL_SIZE + 1, dtype=np.int64)
+        self._author_ids = np.zeros(self.INITIAL_SIZE, dtype=np.int32)
+        self.titles = []
+        self.keys = []
+
+    @classmethod
+    def from_arrays(cls, pub_type, year, offsets, author_ids, titles, keys):
+        """Wrap existing arrays, e.g. memory mapped from a snapshot.
+
+        They are only copied once the first publication is appended."""
+        columns = cls()
+        columns.count = len(pub_type)
+        columns.authorships = len(author_ids)
+        columns._pub_type = pub_type
+        columns._year = year
+        columns._offsets = offsets
+        columns._author_ids = author_ids
+        columns.titles = titles
+        columns.keys = keys
+        return columns
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def pub_type(self):
+        return self._pub_type[:self.count]
+
+    @property
+    def year(self):
+        return self._year[:self.count]
+
+    @property
+    def offsets(self):
+        return self._offsets[:self.count + 1]
+
+    @property
+    def author_ids(self):
+        return self._author_ids[:self.authorships]
+
+    def author_counts(self):
+        """Number of authors of each publication."""
+        return np.diff(self.offsets)
+
+    def authorship_pubs(self):
+        """Publication index of every entry of author_ids."""
+        return np.repeat(np.arange(self.count), self.author_counts())
+
+    def authors_of(self, pubs):
+        """Author ids of each of the given publications, concatenated."""
+        pubs = np.asarray(pubs, dtype=np.int64)
+        starts = self.offsets[pubs]
+        counts = self.offsets[pubs + 1] - starts
+        shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return self.author_ids[np.arange(counts.sum()) + shift]
+
+    def first_listings(self):
+        """Mask over author_ids, False where an author is listed again on
+        the same publication."""
+        n = max(self.count, 1)
+        first = np.zeros(self.authorships, dtype=np.bool_)
+        cells = self.author_ids.astype(np.int64) * n + self.authorship_pubs()
+        first[np.unique(cells, return_index=True)[1]] = True
+        return first
+
+    def authorship_pairs(self, max_pairs=1 << 22):
+        """Yield (left, right) positions in author_ids of every ordered
+        pair of authorships within a publication, including each one paired
+        with itself, a chunk of publications at a time so at most about
+        max_pairs pairs are materialised."""
+        offsets = self.offsets
+        counts = np.diff(offsets)
+        ends = np.cumsum(counts.astype(np.int64) ** 2)
+        lo = 0
+        while lo < self.count:
+            base = ends[lo - 1] if lo else 0
+            hi = max(int(np.searchsorted(ends, base + max_pairs, "right")), lo + 1)
+            k = counts[lo:hi]
+            starts = offsets[lo:hi]
+            # every authorship of the chunk, repeated once per partner
+            first = np.arange(offsets[lo], offsets[hi])
+            partners = np.repeat(k, k)
+            left = np.repeat(first, partners)
+            # the partners of an authorship run over its publication
+            block = np.repeat(np.repeat(starts, k), partners)
+            step = np.arange(len(left)) - np.repeat(np.cumsum(partners) - partners, partners)
+            yield (left, block + step)
+            lo = hi
+
+    def row(self, i):
+        """(pub_type, title, year, authors, key) of publication i."""
+        authors = self._author_ids[self._offsets[i]:self._offsets[i + 1]].tolist()
+        return (int(self._pub_type[i]), self.titles[i], int(self._year[i]),
+            authors, self.keys[i])
+
+    def rows(self):
+        pub_types = self.pub_type.tolist()
+        years = self.year.tolist()
+        offsets = self.offsets.tolist()
+        ids = self.author_ids.tolist()
+        for i in xrange(len(pub_types)):
+            yield (pub_types[i], self.titles[i], years[i],
+                ids[offsets[i]:offsets[i + 1]], self.keys[i])
+
+    def _reserve(self, a, size):
+        # read-only (memory mapped) arrays are copied on the first append
+        if size <= len(a) and a.flags.writeable:
+            return a
+        grown = np.zeros(max(size, 2 * len(a)), dtype=a.dtype)
+        grown[:len(a)] = a
+        return grown
+
+    def append(self, pub_type, title, year, idlist, key):
+        i = self.count
+        j = self.authorships
+        k = j + len(idlist)
+        self._pub_type = self._reserve(self._pub_type, i + 1)
+        self._year = self._reserve(self._year, i + 1)
+        self._offsets = self._reserve(self._offsets, i + 2)
+        self._author_ids = self._reserve(self._author_ids, k)
+        self._pub_type[i] = pub_type
+        self._year[i] = year
+        self._author_ids[j:k] = idlist
+        self._offsets[i + 1] = k
+        self.titles.append(title)
+        self.keys.append(key)
+        self.count = i + 1
+        self.authorships = k
+
+    def extend(self, pub_type, year, counts, author_ids, titles, keys):
+        """Append many publications at once, counts giving how many of
+        author_ids belong to each."""
+        i = self.count
+        n = len(pub_type)
+        j = self.authorships
+        k = j + len(author_ids)
+        self._pub_type = self._reserve(self._pub_type, i + n)
+        self._year = self._reserve(self._year, i + n)
+        self._offsets = self._reserve(self._offsets, i + n + 1)
+        self._author_ids = self._reserve(self._author_ids, k)
+        self._pub_type[i:i + n] = pub_type
+        self._year[i:i + n] = year
+        self._author_ids[j:k] = author_ids
+        self._offsets[i + 1:i + n + 1] = j + np.cumsum(counts)
+        self.titles.extend(titles)
+        self.keys.extend(keys)
+        self.count = i + n
+        self.authorships = k
@@ -0,0 +1,78 @@
+from comp62521.database.bitmap import AuthorSet
+import numpy as np
+
+class AggregateCube:
+    """Publication and authorship counts by year, publication type and
+    author, from which the statistics tables are read.
+
+    pubs[y, t] is the number of publications of type t in year
+    first_year + y, for every year from the first to the last, including
+    years without any. Authorships are too many to keep densely, so they
+    are counted in sparse cells: one per (year, type, author) that occurs,
+    sorted in that order, where count is how many times the author is
+    listed on publications of that type and year."""
+
+    def __init__(self, first_year, pubs, year, pub_type, author, count, na):
+        self.first_year = first_year
+        self.pubs = pubs
+        self.year = year
+        self.pub_type = pub_type
+        self.author = author
+        self.count = count
+        self.na = na
+        self._distinct = None
+
+    @classmethod
+    def build(cls, columns, na):
+        c = columns
+        first_year = int(c.year.min()) if len(c) else 0
+        ny = int(c.year.max()) - first_year + 1 if len(c) else 0
+        groups = (c.year.astype(np.int64) - first_year) * 4 + c.pub_type
+        pubs = np.bincount(groups, minlength=ny * 4).reshape(ny, 4)
+
+        m = max(na, 1)
+        cells, count = np.unique(
+            np.repeat(groups, c.author_counts()) * m + c.author_ids,
+            return_counts=True)
+        groups = cells // m
+        return cls(first_year, pubs, groups // 4, (groups % 4).astype(np.int8),
+            (cells % m).astype(np.int32), count, na)
+
+    def years(self):
+        """Every year from the first to the last."""
+        return np.arange(self.first_year, self.first_year + len(self.pubs))
+
+    def present(self):
+        """Mask of the years that have publications."""
+        return self.pubs.sum(axis=1) > 0
+
+    def authorships(self):
+        """Number of times each author (rows) is listed on publications of
+        each type (columns)."""
+        counts = np.bincount(self.author.astype(np.int64) * 4 + self.pub_type,
+            self.count, minlength=self.na * 4)
+        return counts.astype(np.int64).reshape(self.na, 4)
+
+    def distinct_authors(self):
+        """Number of distinct authors by year and type (ny x 4), by year,
+        by type and overall.
+
+        The cells of a (year, type) are distinct authors already; the
+        unions are taken over AuthorSet bitmaps of those cells, one year
+        at a time."""
+        if self._distinct is None:
+            ny = len(self.pubs)
+            groups = self.year * 4 + self.pub_type
+            bounds = np.searchsorted(groups, np.arange(ny * 4 + 1))
+            by_cell = np.diff(bounds).reshape(ny, 4)
+            by_year = np.zeros(ny, dtype=np.int64)
+            by_type = [ AuthorSet.empty(self.na) for _ in range(4) ]
+            for i in np.flatnonzero(self.present()).tolist():
+                sets = [ AuthorSet.from_ids(self.author[bounds[j]:bounds[j + 1]], self.na)
+                    for j in range(4 * i, 4 * i + 4) ]
+                by_year[i] = len(AuthorSet.union(sets, self.na))
+                for t in range(4):
+                    by_type[t] |= sets[t]
+            self._distinct = (by_cell, by_year, [ len(s) for s in by_type ],
+                len(AuthorSet.union(by_type, self.na)))
+        return self._distinct
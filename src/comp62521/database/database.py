@@ -1,17 +1,46 @@
-from comp62521.statistics import average
+from comp62521.database import snapshot
+from comp62521.database.cache import DEFAULT_BUDGET, ResultCache, cached
+from comp62521.database.columns import PublicationColumns
+from comp62521.database.cube import AggregateCube
+from comp62521.database.graph import CoauthorEdges, CoauthorGraph
+from comp62521.database.postings import AuthorPublications
+from comp62521.database.profiles import AuthorProfiles
+from comp62521.database.yearindex import YearIndex
+from comp62521.statistics import average, grouped, sparse
+from collections import OrderedDict
+from cStringIO import StringIO
+import heapq
+import inspect
 import itertools
+import mmap
+import multiprocessing
+import os
+import re
+import threading
 import numpy as np
+from xml.etree.cElementTree import ParseError, XMLParser
+from xml.parsers import expat
 from xml.sax import handler, make_parser, SAXException
 
 PublicationType = ["Conference Paper", "Journal", "Book", "Book Chapter"]
 
+RECORD_START = re.compile(r"<(?:article|inproceedings|book|incollection)[\s>]")
+DOCUMENT_START = re.compile(r"<[A-Za-z_]")
+SHARDS_PER_PROCESS = 4
+
+# derived structures kept in snapshots, by their _derived name; each is
+# rebuilt from the arguments of its constructor, saved as its attributes
+SNAPSHOT_DERIVED = {"graph":CoauthorGraph, "cube":AggregateCube,
+    "profiles":AuthorProfiles, "years":YearIndex, "edges":CoauthorEdges,
+    "postings":AuthorPublications}
+
 class Publication:
     CONFERENCE_PAPER = 0
     JOURNAL = 1
     BOOK = 2
     BOOK_CHAPTER = 3
 
-    def __init__(self, pub_type, title, year, authors):
+    def __init__(self, pub_type, title, year, authors, key=None):
         self.pub_type = pub_type
         self.title = title
         if year:
@@ -19,47 +48,304 @@ class Publication:
         else:
             self.year = -1
         self.authors = authors
+        self.key = key
 
 class Author:
-    soloPublishCount = 0
-    firstAuthorCount = 0
-    lastAuthorCount = 0
-    publishCount = 0
-    confPaperCount = 0
-    journalArtCount = 0
-    bookChapterCount = 0
-    bookCount = 0
-    coAuthorCount = 0
-    id = -1
-
     def __init__(self, name):
         self.name = name
-        self.soloPublishCount = 0
-        self.firstAuthorCount = 0
-        self.lastAuthorCount = 0
-        self.publishCount = 0
-        self.confPaperCount = 0
-        self.journalArtCount = 0
-        self.bookChapterCount = 0
-        self.bookCount = 0
-        self.coAuthorCount = 0
-        self.id = -1
+        self.sort_key = collation_key(name)
+
+def collation_key(name):
+    """(surname, given names) of a name, the order author tables sort in."""
+    names = name.split(' ')
+    return (names[-1], ' '.join(names[:-1]))
+
+class PublicationList:
+    """Read-only sequence view over the publication columns.
+
+    Publication objects are created on access, the columns hold the only
+    copy of the data."""
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ self[j] for j in xrange(*i.indices(len(self))) ]
+        if i < 0:
+            i += len(self.columns)
+        if i < 0 or i >= len(self.columns):
+            raise IndexError("publication index out of range")
+        return Publication(*self.columns.row(i))
+
+    def __iter__(self):
+        for row in self.columns.rows():
+            yield Publication(*row)
+
+class AuthorList:
+    """Sequence view over the author names of a snapshot.
+
+    Author objects are created on access, the names stay packed in the
+    snapshot until then."""
+    def __init__(self, names):
+        self.names = names
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ Author(n) for n in self.names[i] ]
+        return Author(self.names[i])
+
+    def __iter__(self):
+        for name in self.names:
+            yield Author(name)
+
+    def append(self, author):
+        self.names.append(author.name)
 
 class Stat:
     STR = ["Mean", "Median", "Mode"]
     FUNC = [average.mean, average.median, average.mode]
+    # the same, over every group of a set of values at once
+    GROUPED = [grouped.mean, grouped.median, grouped.mode]
+    # the same, over a vector given by its non-zero values
+    SPARSE = [sparse.mean, sparse.median, sparse.mode]
     MEAN = 0
     MEDIAN = 1
     MODE = 2
 
 class Database:
-    def read(self, filename):
-        self.publications = []
+    def __init__(self, cache_budget=DEFAULT_BUDGET):
+        # bytes of query results kept, see ResultCache
+        self.cache_budget = cache_budget
+        self.clear()
+
+    def read(self, filename, engine="expat", processes=1, append=False):
+        # with append the records are merged into the loaded data, skipping
+        # any whose DBLP key is already present. The derived structures are
+        # then rebuilt from all of the data, not merged with the new records;
+        # the rebuild is vectorised and costs a fraction of reading the file
+        if not append:
+            self.clear()
+
+        if engine == "sax":
+            valid = self._read_sax(filename)
+        elif engine == "expat" and processes > 1:
+            valid = self._read_parallel(filename, processes)
+        elif engine == "expat":
+            valid = self._read_expat(filename)
+        else:
+            raise ValueError("Unknown ingest engine '%s'" % engine)
+
+        self.build_indexes()
+        return valid
+
+    def clear(self):
+        self.columns = PublicationColumns()
+        self.publications = PublicationList(self.columns)
         self.authors = []
         self.author_idx = {}
+        self.key_idx = {}
         self.min_year = None
         self.max_year = None
-
+        # bumped on every change to the publications; structures derived
+        # from them are rebuilt when their version is out of date
+        self.version = 0
+        self.derived = {}
+        # builds of derived structures are serialised, so concurrent
+        # requests build each one once
+        self.derived_lock = threading.RLock()
+        self.results = ResultCache(self.cache_budget)
+
+    def _derived(self, name, build):
+        cached = self.derived.get(name)
+        if cached is None or cached[0] != self.version:
+            with self.derived_lock:
+                cached = self.derived.get(name)
+                if cached is None or cached[0] != self.version:
+                    cached = (self.version, build())
+                    self.derived[name] = cached
+        return cached[1]
+
+    def build_indexes(self):
+        """Build every derived structure for the current publications."""
+        self.coauthor_graph()
+        self._author_profiles()
+        self.aggregate_cube()
+        self.year_index()
+        self.coauthor_edges()
+        self.author_publications()
+        self.collation_rank()
+
+    def coauthor_graph(self):
+        """The CoauthorGraph of the current publications."""
+        return self._derived("graph",
+            lambda: CoauthorGraph.build(self.columns, len(self.authors)))
+
+    def aggregate_cube(self):
+        """The AggregateCube of the current publications."""
+        return self._derived("cube",
+            lambda: AggregateCube.build(self.columns, len(self.authors)))
+
+    def coauthor_edges(self):
+        """The CoauthorEdges of every (year, type) of the year index."""
+        return self._derived("edges", lambda: CoauthorEdges.build(
+            self.columns, len(self.authors), self.year_index()))
+
+    def year_index(self):
+        """The YearIndex of the current publications."""
+        return self._derived("years", lambda: YearIndex.build(self.columns))
+
+    def author_publications(self):
+        """The AuthorPublications of the current publications."""
+        return self._derived("postings",
+            lambda: AuthorPublications.build(self.columns, len(self.authors)))
+
+    def collation_rank(self):
+        """Position of every author when sorted by Author.sort_key."""
+        def build():
+            keys = [ a.sort_key for a in self.authors ]
+            rank = np.empty(len(keys), dtype=np.int64)
+            rank[sorted(xrange(len(keys)), key=keys.__getitem__)] = np.arange(len(keys))
+            return rank
+        return self._derived("collation", build)
+
+    def _collate(self, ids, column=None, descending=0, limit=None):
+        """Positions of ids (author ids) sorted by column, a value for each,
+        then by name, or only the first limit of them. Names are unique so
+        no two keys are equal."""
+        rank = self.collation_rank()[np.asarray(ids, dtype=np.int64)]
+        if limit is not None:
+            limit = max(min(limit, len(rank)), 0)
+        if column is None or isinstance(column, np.ndarray):
+            # one integer key orders by column, then by name
+            key = rank
+            if column is not None:
+                key = column.astype(np.int64) * max(len(self.authors), 1) + rank
+            if descending:
+                key = -key
+            if limit is None or limit == len(key):
+                return np.argsort(key).tolist()
+            if limit == 0:
+                return []
+            top = np.argpartition(key, limit - 1)[:limit]
+            return top[np.argsort(key[top])].tolist()
+        rank = rank.tolist()
+        def key(i):
+            return (column[i], rank[i])
+        if limit is not None:
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            return pick(limit, xrange(len(rank)), key=key)
+        return sorted(xrange(len(rank)), key=key, reverse=bool(descending))
+
+    def _author_order(self, table, key_name, descending, column, limit=None):
+        """Every author sorted by key_name of table, or only the first limit
+        of them; column() gives the values of key_name of every author.
+
+        Full orders are kept until the data changes. Without one, the
+        first limit authors are picked without sorting the rest."""
+        name = ("order", table, key_name, int(descending))
+        cached = self.derived.get(name)
+        every = xrange(len(self.authors))
+        if limit is not None and (cached is None or cached[0] != self.version):
+            return self._collate(every, column(), descending, limit)
+        order = self._derived(name, lambda: self._collate(every, column(), descending))
+        return order if limit is None else order[:max(limit, 0)]
+
+    def _author_profiles(self):
+        return self._derived("profiles",
+            lambda: AuthorProfiles.build(self.columns, self.coauthor_graph()))
+
+    def save_snapshot(self, filename):
+        """Write the publications and every derived structure to a
+        snapshot, so that loading it rebuilds nothing."""
+        c = self.columns
+        titles, title_data, title_missing, _ = snapshot.pack_strings(c.titles)
+        names, name_data, _, name_order = snapshot.pack_strings(
+            [ a.name for a in self.authors ])
+        keys, key_data, key_missing, key_order = snapshot.pack_strings(c.keys)
+        arrays = {
+            "pub_type":c.pub_type,
+            "year":c.year,
+            "author_offsets":c.offsets,
+            "author_ids":c.author_ids,
+            "title_offsets":titles,
+            "title_data":title_data,
+            "title_missing":title_missing,
+            "name_offsets":names,
+            "name_data":name_data,
+            "name_order":name_order,
+            "key_offsets":keys,
+            "key_data":key_data,
+            "key_missing":key_missing,
+            "key_order":key_order }
+        derived = {}
+        with self.derived_lock:
+            self.build_indexes()
+            for name, cls in SNAPSHOT_DERIVED.iteritems():
+                value = self.derived[name][1]
+                derived[name] = {}
+                for attr in inspect.getargspec(cls.__init__).args[1:]:
+                    field = getattr(value, attr)
+                    if isinstance(field, np.ndarray):
+                        arrays["derived/%s/%s" % (name, attr)] = field
+                    else:
+                        derived[name][attr] = field
+            arrays["derived/collation"] = self.collation_rank()
+            # the author orders sorted tables have asked for so far
+            for name, (version, order) in self.derived.items():
+                if name[0] == "order" and version == self.version:
+                    arrays["order/%s/%s/%d" % name[1:]] = np.asarray(order, dtype=np.int64)
+        meta = {"min_year":self.min_year, "max_year":self.max_year, "derived":derived}
+        snapshot.write(filename, meta, arrays)
+
+    def load_snapshot(self, filename):
+        """Map a snapshot written by save_snapshot. Strings are decoded
+        and names looked up straight from the mapping, as they are asked
+        for."""
+        self.clear()
+        try:
+            meta, arrays = snapshot.read(filename)
+        except (IOError, ValueError, snapshot.SnapshotError) as e:
+            print "Error reading snapshot (" + str(e) + ")"
+            return False
+
+        titles = snapshot.PackedStrings(arrays["title_offsets"],
+            arrays["title_data"], arrays["title_missing"])
+        names = snapshot.PackedStrings(arrays["name_offsets"], arrays["name_data"])
+        keys = snapshot.PackedStrings(arrays["key_offsets"],
+            arrays["key_data"], arrays["key_missing"])
+
+        # the numeric columns stay memory mapped until data is appended
+        self.columns = PublicationColumns.from_arrays(arrays["pub_type"],
+            arrays["year"], arrays["author_offsets"], arrays["author_ids"],
+            titles, keys)
+        self.publications = PublicationList(self.columns)
+        self.authors = AuthorList(names)
+        self.author_idx = snapshot.StringIndex(names, arrays["name_order"])
+        self.key_idx = snapshot.StringIndex(keys, arrays["key_order"])
+        self.min_year = meta["min_year"]
+        self.max_year = meta["max_year"]
+
+        for name, cls in SNAPSHOT_DERIVED.iteritems():
+            fields = dict(meta["derived"][name])
+            prefix = "derived/%s/" % name
+            for array_name, a in arrays.iteritems():
+                if array_name.startswith(prefix):
+                    fields[array_name[len(prefix):]] = a
+            self.derived[name] = (self.version, cls(**fields))
+        self.derived["collation"] = (self.version, arrays["derived/collation"])
+        for array_name, order in arrays.iteritems():
+            if array_name.startswith("order/"):
+                _, table, key_name, descending = array_name.split("/")
+                self.derived[("order", table, key_name, int(descending))] = (self.version, order)
+        return True
+
+    def _read_sax(self, filename):
         handler = DocumentHandler(self)
         parser = make_parser()
         parser.setContentHandler(handler)
@@ -71,124 +357,235 @@ class Database:
             valid = False
             print "Error reading file (" + e.getMessage() + ")"
         infile.close()
+        return valid
 
-        for p in self.publications:
-            if self.min_year == None or p.year < self.min_year:
-                self.min_year = p.year
-            if self.max_year == None or p.year > self.max_year:
-                self.max_year = p.year
+    def _read_expat(self, filename):
+        reader = ExpatReader(self)
+        infile = open(filename, "rb")
+        valid = True
+        try:
+            reader.parse(infile, filename)
+        except expat.ExpatError as e:
+            valid = False
+            print "Error reading file (" + str(e) + ")"
+        infile.close()
+        return valid
 
+    def _read_parallel(self, filename, processes):
+        prolog, footer, shards = split_shards(filename, processes * SHARDS_PER_PROCESS)
+        if len(shards) < 2:
+            return self._read_expat(filename)
+        pool = multiprocessing.Pool(processes)
+        valid = True
+        try:
+            jobs = [ (filename, prolog, footer, start, end) for (start, end) in shards ]
+            # imap hands back shards in file order, so author ids are
+            # assigned in the same order as a serial read would
+            for error, names, columns in pool.imap(read_shard, jobs):
+                if error is not None:
+                    valid = False
+                    print "Error reading file (" + error + ")"
+                    break
+                self._merge_shard(names, *columns)
+        finally:
+            pool.terminate()
+            pool.join()
         return valid
 
+    def _merge_shard(self, names, pub_type, year, offsets, author_ids, titles, keys):
+        """Append the publications of a shard read by read_shard, skipping
+        any whose key is already present, with the ids of its authors
+        mapped to those of this database."""
+        keep = np.array([ k is None or k not in self.key_idx for k in keys ], dtype=np.bool_)
+        if not keep.any():
+            return
+        counts = np.diff(offsets)
+        local = author_ids[np.repeat(keep, counts)]
+        # authors of dropped records are not registered, and new ones are
+        # numbered in order of their first appearance in the kept records
+        seen, first = np.unique(local, return_index=True)
+        idmap = np.zeros(len(names), dtype=np.int32)
+        for i in seen[np.argsort(first)].tolist():
+            idmap[i] = self._get_author_id(names[i])
+        pub_id = len(self.columns)
+        kept = np.flatnonzero(keep).tolist()
+        keys = [ keys[i] for i in kept ]
+        for i, k in enumerate(keys):
+            if k is not None:
+                self.key_idx[k] = pub_id + i
+        year = year[keep]
+        self.columns.extend(pub_type[keep], year, counts[keep], np.take(idmap, local),
+            [ titles[i] for i in kept ], keys)
+        if len(self.publications) // 100000 > pub_id // 100000:
+            print "Adding publication number %d (number of authors is %d)" % (len(self.publications), len(self.authors))
+        if self.min_year == None or year.min() < self.min_year:
+            self.min_year = int(year.min())
+        if self.max_year == None or year.max() > self.max_year:
+            self.max_year = int(year.max())
+        self.version += 1
+
     def get_all_authors(self):
         return self.author_idx.keys()
 
+    def _coauthor_pairs(self, start_year, end_year, pub_type):
+        """(left, right) of the distinct co-author pairs in the filter."""
+        # in the order a walk over every pair of every publication meets
+        # them, so that dicts and sets built from them come out the same
+        return self.coauthor_edges().select(
+            self.year_index().buckets(start_year, end_year, pub_type))
+
+    @cached
     def get_coauthor_data(self, start_year, end_year, pub_type, key_name="", descending=0):
+        left, right = self._coauthor_pairs(start_year, end_year, pub_type)
         coauthors = {}
-        for p in self.publications:
-            if ((start_year == None or p.year >= start_year) and
-                (end_year == None or p.year <= end_year) and
-                (pub_type == 4 or pub_type == p.pub_type)):
-                for a in p.authors:
-                    for a2 in p.authors:
-                        if a != a2:
-                            try:
-                                coauthors[a].add(a2)
-                            except KeyError:
-                                coauthors[a] = set([a2])
+        for a, a2 in itertools.izip(left.tolist(), right.tolist()):
+            try:
+                coauthors[a].add(a2)
+            except KeyError:
+                coauthors[a] = set([a2])
         def display(db, coauthors, author_id):
             return "%s (%d)" % (db.authors[author_id].name, len(coauthors[author_id]))
 
+        labels = dict((a, display(self, coauthors, a)) for a in coauthors)
+
         header = ("Author", "Co-Authors")
+        ids = list(coauthors)
         data = []
-        for a in coauthors:
-            data.append([ display(self, coauthors, a),
-                ", ".join([
-                    display(self, coauthors, ca) for ca in coauthors[a] ]) ])
-
-        def get_author(x):
-            temp=x[0].split(' ')
-            return (temp[len(temp)-2],' '.join(temp[0:len(temp)-2]))
-        def get_coauthors(x):
-            temp=x[0].split(' ')
-            return (x[1],temp[len(temp)-2],' '.join(temp[0:len(temp)-2]))
-        key_array={"author":get_author, "coauthors":get_coauthors}
-
-        if key_name != "":
-            data.sort(key=key_array[key_name], reverse=descending)
+        for a in ids:
+            data.append([ labels[a],
+                ", ".join([ labels[ca] for ca in coauthors[a] ]) ])
+
+        if key_name == "author":
+            data = [ data[i] for i in self._collate(ids, None, descending) ]
+        elif key_name == "coauthors":
+            column = [ row[1] for row in data ]
+            data = [ data[i] for i in self._collate(ids, column, descending) ]
+        elif key_name != "":
+            raise KeyError(key_name)
 
         return (header, data)
 
+    @cached
+    def _coauthor_rows(self, start_year, end_year, pub_type):
+        """(rows, count) of the filter: the authors with co-authors in it,
+        in the order get_coauthor_data lists them, and how many co-authors
+        every author has in it. Every page and expanded author of the
+        filter shares them."""
+        left, right = self._coauthor_pairs(start_year, end_year, pub_type)
+        # the pairs are distinct, so this counts distinct co-authors
+        count = np.bincount(left, minlength=len(self.authors))
+        rows = np.array(dict.fromkeys(left.tolist()).keys(), dtype=np.int32)
+        return (rows, count)
+
+    @cached
+    def _coauthor_order(self, start_year, end_year, pub_type, key_name, descending):
+        """The rows of _coauthor_rows sorted by key_name."""
+        rows, count = self._coauthor_rows(start_year, end_year, pub_type)
+        if key_name == "author":
+            return rows[self._collate(rows, None, descending)]
+        elif key_name == "coauthors":
+            return rows[self._collate(rows, count[rows], descending)]
+        elif key_name != "":
+            raise KeyError(key_name)
+        return rows
+
+    @cached
+    def get_coauthor_page(self, start_year, end_year, pub_type, key_name="",
+            descending=0, page=1, size=50):
+        """Rows page (from 1) of size of the authors of get_coauthor_data,
+        and the number of rows in all. Each row is the label of an author,
+        how many co-authors they have and their name, which
+        get_coauthors_in takes for the co-authors themselves. Sorting by
+        co-authors sorts by how many there are."""
+        rows = self._coauthor_order(start_year, end_year, pub_type, key_name, descending)
+        count = self._coauthor_rows(start_year, end_year, pub_type)[1]
+
+        header = ("Author", "Co-Authors")
+        start = max(page - 1, 0) * size
+        data = [ [ "%s (%d)" % (self.authors[a].name, count[a]), int(count[a]),
+            self.authors[a].name ] for a in rows[start:start + size].tolist() ]
+        return (header, data, len(rows))
+
+    @cached
+    def get_coauthors_in(self, name, start_year, end_year, pub_type):
+        """The co-authors of one author in the filter, labelled as in
+        get_coauthor_data, found from the publications of that author."""
+        author_id = self.author_idx[name]
+        c = self.columns
+        years = self.year_index()
+        pubs = self.author_publications().of(author_id)
+        buckets = years.bucket_of(c.year[pubs], c.pub_type[pubs])
+        pubs = pubs[np.in1d(buckets, years.buckets(start_year, end_year, pub_type))]
+        ids = set(c.authors_of(pubs).tolist())
+        ids.discard(author_id)
+        count = self._coauthor_rows(start_year, end_year, pub_type)[1]
+        return [ "%s (%d)" % (self.authors[a].name, count[a]) for a in ids ]
+
+    def _authorship_types(self):
+        """Publication type of every entry of columns.author_ids."""
+        c = self.columns
+        return np.repeat(c.pub_type, c.author_counts())
+
+    def _auth_per_pub(self):
+        """Author counts of the publications of each type."""
+        counts = self.columns.author_counts()
+        pub_type = self.columns.pub_type
+        return [ counts[pub_type == i] for i in range(4) ]
+
+    @cached
     def get_average_authors_per_publication(self, av):
         header = ("Conference Paper", "Journal", "Book", "Book Chapter", "All Publications")
 
-        auth_per_pub = [[], [], [], []]
-
-        for p in self.publications:
-            auth_per_pub[p.pub_type].append(len(p.authors))
+        auth_per_pub = self._auth_per_pub()
 
         func = Stat.FUNC[av]
 
-        data = [ func(auth_per_pub[i]) for i in np.arange(4) ] + [ func(list(itertools.chain(*auth_per_pub))) ]
+        data = [ func(auth_per_pub[i]) for i in np.arange(4) ] + [ func(np.concatenate(auth_per_pub)) ]
         return (header, data)
 
+    @cached
     def get_average_publications_per_author(self, av):
         header = ("Conference Paper", "Journal", "Book", "Book Chapter", "All Publications")
 
-        pub_per_auth = np.zeros((len(self.authors), 4))
-
-        for p in self.publications:
-            for a in p.authors:
-                pub_per_auth[a, p.pub_type] += 1
+        pub_per_auth = self.aggregate_cube().authorships()
 
         func = Stat.FUNC[av]
 
         data = [ func(pub_per_auth[:, i]) for i in np.arange(4) ] + [ func(pub_per_auth.sum(axis=1)) ]
         return (header, data)
 
+    @cached
     def get_average_publications_in_a_year(self, av):
         header = ("Conference Paper",
             "Journal", "Book", "Book Chapter", "All Publications")
 
-        ystats = np.zeros((int(self.max_year) - int(self.min_year) + 1, 4))
-
-        for p in self.publications:
-            ystats[p.year - self.min_year][p.pub_type] += 1
+        ystats = self.aggregate_cube().pubs
 
         func = Stat.FUNC[av]
 
         data = [ func(ystats[:, i]) for i in np.arange(4) ] + [ func(ystats.sum(axis=1)) ]
         return (header, data)
 
+    @cached
     def get_average_authors_in_a_year(self, av):
         header = ("Conference Paper",
             "Journal", "Book", "Book Chapter", "All Publications")
 
-        yauth = [ [set(), set(), set(), set(), set()] for _ in range(int(self.min_year), int(self.max_year) + 1) ]
-
-        for p in self.publications:
-            for a in p.authors:
-                yauth[p.year - self.min_year][p.pub_type].add(a)
-                yauth[p.year - self.min_year][4].add(a)
-
-        ystats = np.array([ [ len(S) for S in y ] for y in yauth ])
+        by_type, by_year, _, _ = self.aggregate_cube().distinct_authors()
+        ystats = np.column_stack((by_type, by_year))
 
         func = Stat.FUNC[av]
 
         data = [ func(ystats[:, i]) for i in np.arange(5) ]
         return (header, data)
 
+    @cached
     def get_publication_summary_average(self, av):
         header = ("Details", "Conference Paper",
             "Journal", "Book", "Book Chapter", "All Publications")
 
-        pub_per_auth = np.zeros((len(self.authors), 4))
-        auth_per_pub = [[], [], [], []]
-
-        for p in self.publications:
-            auth_per_pub[p.pub_type].append(len(p.authors))
-            for a in p.authors:
-                pub_per_auth[a, p.pub_type] += 1
+        pub_per_auth = self.aggregate_cube().authorships()
+        auth_per_pub = self._auth_per_pub()
 
         name = Stat.STR[av]
         func = Stat.FUNC[av]
@@ -196,25 +593,21 @@ class Database:
         data = [
             [name + " authors per publication"]
                 + [ func(auth_per_pub[i]) for i in np.arange(4) ]
-                + [ func(list(itertools.chain(*auth_per_pub))) ],
+                + [ func(np.concatenate(auth_per_pub)) ],
             [name + " publications per author"]
                 + [ func(pub_per_auth[:, i]) for i in np.arange(4) ]
                 + [ func(pub_per_auth.sum(axis=1)) ] ]
         return (header, data)
 
+    @cached
     def get_publication_summary(self, key_name="", descending=0):
         header = ("Details", "Conference Paper",
             "Journal", "Book", "Book Chapter", "Total")
 
-        plist = [0, 0, 0, 0]
-        alist = [set(), set(), set(), set()]
-
-        for p in self.publications:
-            plist[p.pub_type] += 1
-            for a in p.authors:
-                alist[p.pub_type].add(a)
-        # create union of all authors
-        ua = alist[0] | alist[1] | alist[2] | alist[3]
+        cube = self.aggregate_cube()
+        plist = cube.pubs.sum(axis=0).tolist()
+        # ua is the size of the union of all authors
+        _, _, alist, ua = cube.distinct_authors()
 
 	def get_details(x):
 	    return x[0]
@@ -232,100 +625,83 @@ class Database:
 
         data = [
             ["Number of publications"] + plist + [sum(plist)],
-            ["Number of authors"] + [ len(a) for a in alist ] + [len(ua)] ]
+            ["Number of authors"] + alist + [ua] ]
 
 	if key_name != "":
             data.sort(key=key_array[key_name], reverse=descending)
         return (header, data)
 
+    @cached
     def get_average_authors_per_publication_by_author(self, av):
         header = ("Author", "Number of conference papers",
             "Number of journals", "Number of books",
             "Number of book chapters", "All publications")
 
-        astats = [ [[], [], [], []] for _ in range(len(self.authors)) ]
-        for p in self.publications:
-            for a in p.authors:
-                astats[a][p.pub_type].append(len(p.authors))
-
-        func = Stat.FUNC[av]
-
-        data = [ [self.authors[i].name]
-            + [ func(L) for L in astats[i] ]
-            + [ func(list(itertools.chain(*astats[i]))) ]
-            for i in range(len(astats)) ]
+        c = self.columns
+        na = len(self.authors)
+        types = self._authorship_types()
+        counts = c.author_counts()[c.authorship_pubs()]
+        # the values of an author's "all" group run through the types in
+        # turn, each in publication order
+        order = np.argsort(c.author_ids.astype(np.int64) * 4 + types, kind="mergesort")
+
+        func = Stat.GROUPED[av]
+        by_type = func(c.author_ids.astype(np.int64) * 4 + types, counts, na * 4)
+        total = func(c.author_ids[order], counts[order], na)
+
+        data = [ [self.authors[i].name] + by_type[4 * i:4 * i + 4] + [total[i]]
+            for i in range(na) ]
         return (header, data)
 
 
-    def get_publications_by_author(self, key_name="", descending=0):
+    @cached
+    def get_publications_by_author(self, key_name="", descending=0, limit=None):
         header = ("Author", "Number of conference papers",
             "Number of journals", "Number of books",
             "Number of book chapters", "Total")
 
-        astats = [ [0, 0, 0, 0] for _ in range(len(self.authors)) ]
-        for p in self.publications:
-            for a in p.authors:
-                astats[a][p.pub_type] += 1
-
-        def get_author(x):
-            temp=x[0].split(' ')
-            return (temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_papers(x):
-            temp=x[0].split(' ')
-            return (x[1],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_journals(x):
-            temp=x[0].split(' ')
-            return (x[2],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_books(x):
-            temp=x[0].split(' ')
-            return (x[3],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_chapters(x):
-            temp=x[0].split(' ')
-            return (x[4],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_total(x):
-            temp=x[0].split(' ')
-            return (x[5],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        key_array={"author":get_author, "conference":get_papers, "journals":get_journals, "books":get_books, "chapters":get_chapters, "total":get_total}
+        counts = self.aggregate_cube().authorships()
+        counts = np.column_stack((counts, counts.sum(axis=1)))
+        key_array={"author":None, "conference":0, "journals":1, "books":2, "chapters":3, "total":4}
 
-        data = [ [self.authors[i].name] + astats[i] + [sum(astats[i])]
-            for i in range(len(astats)) ]
+        order = range(len(counts))[:limit]
         if key_name != "":
-            data.sort(key=key_array[key_name], reverse=descending)
+            column = key_array[key_name]
+            order = self._author_order("publication_author", key_name, descending,
+                lambda: None if column is None else counts[:, column], limit)
+        data = [ [self.authors[i].name] + counts[i].tolist() for i in order ]
         return (header, data)
 
+    @cached
     def get_average_authors_per_publication_by_year(self, av):
         header = ("Year", "Conference papers",
             "Journals", "Books",
             "Book chapters", "All publications")
 
-        ystats = {}
-        for p in self.publications:
-            try:
-                ystats[p.year][p.pub_type].append(len(p.authors))
-            except KeyError:
-                ystats[p.year] = [[], [], [], []]
-                ystats[p.year][p.pub_type].append(len(p.authors))
+        c = self.columns
+        years, year_idx = np.unique(c.year, return_inverse=True)
+        ny = len(years)
+        counts = c.author_counts()
+        order = np.argsort(year_idx * 4 + c.pub_type, kind="mergesort")
 
-        func = Stat.FUNC[av]
+        func = Stat.GROUPED[av]
+        by_type = func(year_idx * 4 + c.pub_type, counts, ny * 4)
+        total = func(year_idx[order], counts[order], ny)
 
-        data = [ [y]
-            + [ func(L) for L in ystats[y] ]
-            + [ func(list(itertools.chain(*ystats[y]))) ]
-            for y in ystats ]
+        ystats = dict(zip(years.tolist(),
+            [ by_type[4 * i:4 * i + 4] + [total[i]] for i in range(ny) ]))
+        data = [ [y] + ystats[y] for y in ystats ]
         return (header, data)
 
+    @cached
     def get_publications_by_year(self, key_name="", descending=0):
         header = ("Year", "Number of conference papers",
             "Number of journals", "Number of books",
             "Number of book chapters", "Total")
 
-        ystats = {}
-        for p in self.publications:
-            try:
-                ystats[p.year][p.pub_type] += 1
-            except KeyError:
-                ystats[p.year] = [0, 0, 0, 0]
-                ystats[p.year][p.pub_type] += 1
+        cube = self.aggregate_cube()
+        present = cube.present()
+        ystats = dict(zip(cube.years()[present].tolist(), cube.pubs[present].tolist()))
 
         def get_year(x):
             return x[0]
@@ -346,48 +722,51 @@ class Database:
             data.sort(key=key_array[key_name], reverse=descending)
         return (header, data)
 
+    @cached
     def get_average_publications_per_author_by_year(self, av):
         header = ("Year", "Conference papers",
             "Journals", "Books",
             "Book chapters", "All publications")
 
-        ystats = {}
-        for p in self.publications:
-            try:
-                s = ystats[p.year]
-            except KeyError:
-                s = np.zeros((len(self.authors), 4))
-                ystats[p.year] = s
-            for a in p.authors:
-                s[a][p.pub_type] += 1
+        # the counts of each year are sparse: only authors with publications
+        # that year have cells, every other author counts as a zero
+        cube = self.aggregate_cube()
+        na = len(self.authors)
+        rows = np.searchsorted(cube.year, np.arange(len(cube.pubs) + 1))
+        type_rows = np.searchsorted(cube.year * 4 + cube.pub_type,
+            np.arange(4 * len(cube.pubs) + 1))
 
-        func = Stat.FUNC[av]
+        func = Stat.SPARSE[av]
 
-        data = [ [y]
-            + [ func(ystats[y][:, i]) for i in np.arange(4) ]
-            + [ func(ystats[y].sum(axis=1)) ]
-            for y in ystats ]
+        ystats = {}
+        for i in np.flatnonzero(cube.present()).tolist():
+            row = []
+            for j in range(4 * i, 4 * i + 4):
+                cells = slice(type_rows[j], type_rows[j + 1])
+                row.append(func(cube.author[cells], cube.count[cells], na))
+            cells = slice(rows[i], rows[i + 1])
+            authors, inverse = np.unique(cube.author[cells], return_inverse=True)
+            row.append(func(authors, np.bincount(inverse, cube.count[cells]).astype(np.int64), na))
+            ystats[cube.first_year + i] = row
+
+        data = [ [y] + ystats[y] for y in ystats ]
         return (header, data)
 
+    @cached
     def get_author_totals_by_year(self):
         header = ("Year", "Number of conference papers",
             "Number of journals", "Number of books",
             "Number of book chapers", "Total")
 
-        ystats = {}
-        for p in self.publications:
-            try:
-                s = ystats[p.year][p.pub_type]
-            except KeyError:
-                ystats[p.year] = [set(), set(), set(), set()]
-                s = ystats[p.year][p.pub_type]
-            for a in p.authors:
-                s.add(a)
-        data = [ [y] + [len(s) for s in ystats[y]] + [len(ystats[y][0] | ystats[y][1] | ystats[y][2] | ystats[y][3])]
-            for y in ystats ]
+        cube = self.aggregate_cube()
+        by_type, totals, _, _ = cube.distinct_authors()
+        present = cube.present()
+        ystats = dict(zip(cube.years()[present].tolist(),
+            np.column_stack((by_type, totals))[present].tolist()))
+        data = [ [y] + ystats[y] for y in ystats ]
         return (header, data)
 
-    def add_publication(self, pub_type, title, year, authors):
+    def add_publication(self, pub_type, title, year, authors, key=None):
         if year == None or len(authors) == 0:
             print "Warning: excluding publication due to missing information"
             print "    Publication type:", PublicationType[pub_type]
@@ -395,19 +774,28 @@ class Database:
             print "    Year:", year
             print "    Authors:", ",".join(authors)
             return
+        if key is not None and key in self.key_idx:
+            return
         if title == None:
             print "Warning: adding publication with missing title [ %s %s (%s) ]" % (PublicationType[pub_type], year, ",".join(authors))
-        idlist = []
-        for a in authors:
-            try:
-                idlist.append(self.author_idx[a])
-            except KeyError:
-                a_id = len(self.authors)
-                self.author_idx[a] = a_id
-                idlist.append(a_id)
-                self.authors.append(Author(a))
-        self.publications.append(
-            Publication(pub_type, title, year, idlist))
+        idlist = [ self._get_author_id(a) for a in authors ]
+        self._append_publication(pub_type, title, year, idlist, key)
+
+    def _get_author_id(self, name):
+        try:
+            return self.author_idx[name]
+        except KeyError:
+            a_id = len(self.authors)
+            self.author_idx[name] = a_id
+            self.authors.append(Author(name))
+            return a_id
+
+    def _append_publication(self, pub_type, title, year, idlist, key=None):
+        pub_id = len(self.columns)
+        if key is not None:
+            self.key_idx[key] = pub_id
+        self.columns.append(pub_type, title, int(year) if year else -1,
+            idlist, key)
         if (len(self.publications) % 100000) == 0:
             print "Adding publication number %d (number of authors is %d)" % (len(self.publications), len(self.authors))
 
@@ -415,126 +803,60 @@ class Database:
             self.min_year = year
         if self.max_year == None or year > self.max_year:
             self.max_year = year
+        # only once the row is in, so that nothing built for the new
+        # version can miss it
+        self.version += 1
 
-    def _get_collaborations(self, author_id, include_self):
-        data = {}
-        for p in self.publications:
-            if author_id in p.authors:
-                for a in p.authors:
-                    try:
-                        data[a] += 1
-                    except KeyError:
-                        data[a] = 1
-        if not include_self:
-            del data[author_id]
-        return data
-
+    @cached
     def get_coauthor_details(self, name):
         author_id = self.author_idx[name]
-        data = self._get_collaborations(author_id, True)
+        data = self.coauthor_graph().collaborations(author_id, True)
         return [ (self.authors[key].name, data[key])
             for key in data ]
 
+    @cached
     def get_network_data(self):
-        na = len(self.authors)
-
-        nodes = [ [self.authors[i].name, -1] for i in range(na) ]
-        links = set()
-        for a in range(na):
-            collab = self._get_collaborations(a, False)
-            nodes[a][1] = len(collab)
-            for a2 in collab:
-                if a < a2:
-                    links.add((a, a2))
+        graph = self.coauthor_graph()
+        nodes = [ [a.name, d] for a, d in
+            itertools.izip(self.authors, graph.degree().tolist()) ]
+        left, right = graph.edges()
+        links = set(itertools.izip(left.tolist(), right.tolist()))
         return (nodes, links)
 
-    def get_stats_for_author(self, author_name, key_name, descending):
+    @cached
+    def get_stats_for_author(self, author_name, key_name, descending, limit=None):
         header=("Author", "Publications", "Conference Papers", "Journal Articles", "Books","Book Chapters",
         "Co-Authors", "First Author", "Last Author", "Sole Author")
-        data=[]
-        publics = []
         #filtering authors
         authors = self.find_authors(author_name)
-        #filtering author by name
-        for a in authors:
-            #init author
-            a.soloPublishCount = 0
-            a.firstAuthorCount = 0
-            a.lastAuthorCount = 0
-            a.publishCount = 0
-            a.confPaperCount = 0
-            a.journalArtCount = 0
-            a.bookChapterCount = 0
-            a.bookCount = 0
-            a.coAuthorCount = 0
-            a.id = self.author_idx[a.name]
-            coauthors = []
-            for p in self.publications:
-                #print p.authors
-                if a.id in p.authors:
-                    #co-authors
-                    for c in p.authors:
-                        if c not in coauthors:
-                            coauthors.append(c)
-                    a.coAuthorCount = len(coauthors) - 1
-                    #solo
-                    if len(p.authors) == 1:
-                        a.soloPublishCount += 1
-                    #first
-                    else:
-                        if p.authors[0] == a.id:
-                            a.firstAuthorCount += 1
-                        else:
-                            if p.authors[-1] == a.id:#last
-                                a.lastAuthorCount += 1
-                    #pub_type
-                    a.publishCount += 1
-                    if p.pub_type == 0:
-                        a.confPaperCount += 1
-                    elif p.pub_type == 1:
-                        a.journalArtCount += 1
-                    elif p.pub_type == 2:
-                        a.bookCount += 1
-                    elif p.pub_type == 3:
-                        a.bookChapterCount += 1
-            print a.id
-            data.append((a.name, a.publishCount, a.confPaperCount, a.journalArtCount, a.bookCount, a.bookChapterCount,
-            a.coAuthorCount, a.firstAuthorCount, a.lastAuthorCount, a.soloPublishCount))
-
-        def get_author(x):
-            temp = x[0].split(' ')
-            return (temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_total(x):
-            temp = x[0].split(' ')
-            return (x[1],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_papers(x):
-            temp = x[0].split(' ')
-            return (x[2],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_journals(x):
-            temp = x[0].split(' ')
-            return (x[3],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_chapters(x):
-            temp = x[0].split(' ')
-            return (x[4],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_books(x):
-            temp = x[0].split(' ')
-            return (x[5],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_coauthor(x):
-            temp = x[0].split(' ')
-            return (x[6],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_first(x):
-            temp = x[0].split(' ')
-            return (x[7],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_last(x):
-            temp = x[0].split(' ')
-            return (x[8],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        def get_sole(x):
-            temp = x[0].split(' ')
-            return (x[9],temp[len(temp)-1],' '.join(temp[0:len(temp)-1]))
-        key_array={"author":get_author, "conference":get_papers, "journals":get_journals, "books":get_books, "chapters":get_chapters, "total":get_total, "coauthor":get_coauthor, "first":get_first, "last":get_last, "sole": get_sole}
+        # read from the profiles of every author, so nothing is written
+        # and concurrent requests do not see each other
+        if (author_name is None) | (author_name == ""):
+            ids = np.arange(len(authors), dtype=np.int64)
+        else:
+            ids = np.array([ self.author_idx[a.name] for a in authors ], dtype=np.int64)
+        profiles = self._author_profiles()
+        counts = profiles.counts[ids].sum(axis=2)
+        by_type = profiles.counts[ids, AuthorProfiles.ALL]
+        columns = np.column_stack((counts[:, AuthorProfiles.ALL], by_type,
+            profiles.coauthors[ids], counts[:, AuthorProfiles.FIRST],
+            counts[:, AuthorProfiles.LAST_ONLY], counts[:, AuthorProfiles.SOLE]))
+        data = [ (a.name,) + tuple(row) for a, row in itertools.izip(authors, columns.tolist()) ]
+
+        # the column of data each key sorts on, before the name
+        key_array={"author":None, "total":1, "conference":2, "journals":3, "chapters":4, "books":5, "coauthor":6, "first":7, "last":8, "sole":9}
         if key_name != "":
-            data.sort(key=(key_array[key_name]), reverse=int(descending))
-        return(header,data)
+            column = key_array[key_name]
+            def values():
+                if column is not None:
+                    return np.array([ row[column] for row in data ], dtype=np.int64)
+            if (author_name is None) | (author_name == ""):
+                # data has a row for every author, in order
+                order = self._author_order("stats", key_name, int(descending), values, limit)
+            else:
+                order = self._collate(ids, values(), int(descending), limit)
+            data = [ data[i] for i in order ]
+        return(header,data[:limit])
 
     def find_authors(self, author_name):
         if (author_name is None) | (author_name == ""):
@@ -546,115 +868,41 @@ class Database:
                     authors.append(a)
             return authors
 
-    def get_authors_pages_publications(self,name):
-        PUcount = 0
-        PUjournalArtCount = 0
-        PUconfPaperCount = 0
-        PUbookCount = 0
-        PUbookChapterCount = 0
-        id_PUauthor=self.author_idx[name]
-        for p in self.publications:
-            if id_PUauthor in p.authors:
-                PUcount += 1
-                if p.pub_type == 0:
-                    PUconfPaperCount += 1
-                elif p.pub_type == 1:
-                    PUjournalArtCount += 1
-                elif p.pub_type == 2:
-                    PUbookCount += 1
-                elif p.pub_type == 3:
-                    PUbookChapterCount += 1
-        data = [PUcount, PUjournalArtCount,  PUconfPaperCount, PUbookCount, PUbookChapterCount]
+    @cached
+    def get_author_profile(self, name):
+        """All the counts shown on the page of an author.
+
+        publications, first, last and sole are [overall, journal articles,
+        conference papers, books, book chapters]; coauthors is the number
+        of distinct co-authors on publications with several authors, or -1
+        if there are none."""
+        profiles = self._author_profiles()
+        a = self.author_idx[name]
+        data = {
+            "publications":profiles.row(a, AuthorProfiles.ALL),
+            "first":profiles.row(a, AuthorProfiles.FIRST),
+            "last":profiles.row(a, AuthorProfiles.LAST),
+            "sole":profiles.row(a, AuthorProfiles.SOLE) }
+        if data["publications"][0] > data["sole"][0]:
+            data["coauthors"] = int(profiles.coauthors[a])
+        else:
+            data["coauthors"] = -1
         return data
 
+    def get_authors_pages_publications(self,name):
+        return self.get_author_profile(name)["publications"]
+
     def get_authors_pages_first_author(self,name):
-        FAcount = 0
-        FAjournalArtCount = 0
-        FAconfPaperCount = 0
-        FAbookCount = 0
-        FAbookChapterCount = 0
-
-        id_FAauthor = self.author_idx[name]
-        for p in self.publications:
-            if id_FAauthor in p.authors:
-                if len(p.authors) != 1:
-                    if id_FAauthor==p.authors[0]:
-                        FAcount += 1
-                        if p.pub_type == 0:
-                            FAconfPaperCount += 1
-                        elif p.pub_type == 1:
-                            FAjournalArtCount += 1
-                        elif p.pub_type == 2:
-                            FAbookCount += 1
-                        elif p.pub_type == 3:
-                            FAbookChapterCount += 1
-
-        data = [FAcount, FAjournalArtCount,  FAconfPaperCount, FAbookCount, FAbookChapterCount]
-        return data
+        return self.get_author_profile(name)["first"]
 
     def get_authors_pages_last_author(self,name):
-        LAcount = 0
-        LAjournalArtCount = 0
-        LAconfPaperCount = 0
-        LAbookCount = 0
-        LAbookChapterCount = 0
-
-        id_LAauthor = self.author_idx[name]
-        for p in self.publications:
-            if id_LAauthor in p.authors:
-                if len(p.authors) != 1:
-                    if id_LAauthor==p.authors[-1]:
-                        LAcount += 1
-                        if p.pub_type == 0:
-                            LAconfPaperCount += 1
-                        elif p.pub_type == 1:
-                            LAjournalArtCount += 1
-                        elif p.pub_type == 2:
-                            LAbookCount += 1
-                        elif p.pub_type == 3:
-                            LAbookChapterCount += 1
-
-        data = [LAcount, LAjournalArtCount,  LAconfPaperCount, LAbookCount, LAbookChapterCount]
-        return data
+        return self.get_author_profile(name)["last"]
 
     def get_authors_pages_sole_author(self, name):
-        SAcount = 0
-        SAjournalArtCount = 0
-        SAconfPaperCount = 0
-        SAbookCount = 0
-        SAbookChapterCount = 0
-
-        id_SAauthor = self.author_idx[name]
-        for p in self.publications:
-            if id_SAauthor in p.authors:
-                if len(p.authors) == 1:
-                    SAcount += 1
-                    if p.pub_type == 0:
-                        SAconfPaperCount += 1
-                    elif p.pub_type == 1:
-                        SAjournalArtCount += 1
-                    elif p.pub_type == 2:
-                        SAbookCount += 1
-                    elif p.pub_type == 3:
-                        SAbookChapterCount += 1
-
-        data = [SAcount, SAjournalArtCount,  SAconfPaperCount, SAbookCount, SAbookChapterCount]
-        return data
+        return self.get_author_profile(name)["sole"]
 
     def get_authors_pages_coauthors(self,name):
-        CAcount = 0
-        CA=[]
-
-        id_CAauthor = self.author_idx[name]
-        for p in self.publications:
-            if id_CAauthor in p.authors and len(p.authors) != 1:
-                for C in p.authors:
-                    if C not in CA:
-                        CA.append(C)
-        CAcount = len(CA) - 1
-        data = CAcount
-        return data
-
+        return self.get_author_profile(name)["coauthors"]
 
     def judge_number_name(self,nameX):
         if type(nameX) == type(1):
@@ -663,40 +911,57 @@ class Database:
             x = self.author_idx[nameX]
         return x
 
-    def degrees_of_separation(self,authorA,authorB,t,R,M):
+    @cached
+    def degrees_of_separation(self, authorA, authorB, t=0, R=None, M=None):
+        """Number of authors between two authors on a shortest chain of
+        co-authors: 0 for co-authors, "X" if there is no chain.
+
+        t, R and M belonged to an earlier recursive search; they are still
+        accepted but no longer used."""
         authorA_id = self.judge_number_name(authorA)
         authorB_id = self.judge_number_name(authorB)
-        New = []
-        R.append(authorA_id)
-        for p in self.publications:
-            if authorA_id in p.authors:
-                for i in p.authors:
-                    if i not in R:
-                        New.append(i)
-        New = list(set(New))
-        if len(New) == 0:
-            return None
-        else:
-            if authorB_id in New:
-                M.append(t)
-            else:
-                t = t+1
-                for j in New:
-                    self.degrees_of_separation(j,authorB_id,t,R,M)
-        if len(M) != 0:
-            k = min(M)
-        else: k = "X"
+        k = separation(self.coauthor_graph().distance(authorA_id, authorB_id))
         header = ("Author 1", "Author 2", "Degrees_of_Separation")
         data = []
         data.append((authorA ,authorB ,k))
         return (header, data)
 
+    def degrees_of_separation_from(self, author, targets=None):
+        """Yield (author, target, degrees) for each of targets, or for every
+        other author if targets is None, from a single search."""
+        source = self.judge_number_name(author)
+        distances = self.coauthor_graph().distances_from(source)
+        if targets is None:
+            targets = [ a.name for i, a in enumerate(self.authors) if i != source ]
+        for target in targets:
+            yield (author, target,
+                separation(int(distances[self.judge_number_name(target)])))
+
+    def degrees_of_separation_batch(self, pairs):
+        """Yield (authorA, authorB, degrees) for every pair.
+
+        Pairs are grouped by their first author so there is one search per
+        distinct author; rows come out a group at a time, in the order each
+        first author appears."""
+        targets = OrderedDict()
+        for a, b in pairs:
+            targets.setdefault(a, []).append(b)
+        for a in targets:
+            for row in self.degrees_of_separation_from(a, targets[a]):
+                yield row
+
     def return_null(self):
         header = ("Author 1", "Author 2", "Degrees_of_Separation")
         data = []
         data.append((None,None,0))
         return (header, data)
 
+def separation(distance):
+    """Degrees of separation for a co-author graph distance."""
+    if distance > 0:
+        return distance - 1
+    return "X"
+
 class DocumentHandler(handler.ContentHandler):
     TITLE_TAGS = [ "sub", "sup", "i", "tt", "ref" ]
     PUB_TYPE = {
@@ -716,6 +981,7 @@ class DocumentHandler(handler.ContentHandler):
         self.authors = []
         self.year = None
         self.title = None
+        self.key = None
 
     def startDocument(self):
         pass
@@ -728,6 +994,7 @@ class DocumentHandler(handler.ContentHandler):
             return
         if name in DocumentHandler.PUB_TYPE.keys():
             self.pub_type = DocumentHandler.PUB_TYPE[name]
+            self.key = attrs.get("key")
         self.tag = name
         self.chrs = ""
 
@@ -748,7 +1015,8 @@ class DocumentHandler(handler.ContentHandler):
                 self.pub_type,
                 self.title,
                 self.year,
-                self.authors)
+                self.authors,
+                self.key)
             self.clearData()
         self.tag = None
         self.chrs = ""
@@ -756,3 +1024,159 @@ class DocumentHandler(handler.ContentHandler):
     def characters(self, chrs):
         if self.pub_type != None:
             self.chrs += chrs
+
+class ExpatReader:
+    """Streaming reader parsing a batch of records at a time.
+
+    The input is cut just before a record start tag about every CHUNK_SIZE
+    bytes. Each batch is parsed as a document of its own, the prolog, the
+    records and the root end tag, by the C XMLParser of cElementTree, which
+    builds the tree without calling back into Python per element. Memory
+    stays flat regardless of the size of the file.
+
+    The parser does not read external DTDs, so the character entities a
+    DOCTYPE declares in its DTD (&uuml; etc. for DBLP) are read from it
+    once and looked up by the parser."""
+    CHUNK_SIZE = 1 << 20
+    PUB_TYPE = DocumentHandler.PUB_TYPE
+
+    def __init__(self, db):
+        self.db = db
+
+    def parse(self, infile, filename):
+        data = infile.read(self.CHUNK_SIZE)
+        m = DOCUMENT_START.search(data)
+        while m is None or data.find(">", m.start()) < 0:
+            more = infile.read(self.CHUNK_SIZE)
+            if not more:
+                raise expat.ExpatError("no element found")
+            data += more
+            m = DOCUMENT_START.search(data)
+        start = data.find(">", m.start()) + 1
+        self.prolog = data[:start]
+        self.footer = "</%s>" % re.match(r"<([^\s/>]+)", data[m.start():]).group(1)
+        self.entities = dtd_entities(self.prolog, filename)
+        data = data[start:]
+        try:
+            while True:
+                more = infile.read(self.CHUNK_SIZE)
+                if not more:
+                    break
+                data += more
+                # the last record start in the new data; every element
+                # before it is complete
+                cut = 0
+                for m in RECORD_START.finditer(data, max(len(data) - len(more), 1)):
+                    cut = m.start()
+                if cut:
+                    self.parseBatch(data[:cut] + self.footer)
+                    data = data[cut:]
+            self.parseBatch(data)
+        except ParseError as e:
+            raise expat.ExpatError(str(e))
+
+    def parseBatch(self, body):
+        parser = XMLParser()
+        parser.entity.update(self.entities)
+        parser.feed(self.prolog)
+        parser.feed(body)
+        for record in parser.close():
+            pub_type = self.PUB_TYPE.get(record.tag)
+            if pub_type is not None:
+                self.addRecord(pub_type, record)
+
+    def addRecord(self, pub_type, record):
+        authors = []
+        title = None
+        year = None
+        for field in record:
+            tag = field.tag
+            if tag == "author":
+                authors.append(self.text(field))
+            elif tag == "title":
+                title = self.text(field)
+            elif tag == "year":
+                year = int(self.text(field))
+        self.db.add_publication(pub_type, title, year, authors, record.get("key"))
+
+    def text(self, field):
+        # only titles carry markup (<i>, <sub>, ...) worth walking into
+        if len(field):
+            return "".join(field.itertext()).strip()
+        return (field.text or "").strip()
+
+DOCTYPE_SYSTEM = re.compile(r"""<!DOCTYPE\s+\S+\s+(?:SYSTEM|PUBLIC\s+(?:"[^"]*"|'[^']*'))\s+(?:"([^"]*)"|'([^']*)')""")
+ENTITY_DECL = re.compile(r"""<!ENTITY\s+([^\s%]+)\s+(?:"([^"]*)"|'([^']*)')\s*>""")
+CHAR_REF = re.compile(r"&#(x[0-9a-fA-F]+|[0-9]+);")
+
+def dtd_entities(prolog, filename):
+    """The general entities declared in the external DTD named by the
+    DOCTYPE of prolog, relative to filename, or none if it cannot be read."""
+    m = DOCTYPE_SYSTEM.search(prolog)
+    if m is None:
+        return {}
+    path = os.path.join(os.path.dirname(filename or ""), m.group(1) or m.group(2))
+    try:
+        dtd = open(path, "rb").read()
+    except IOError:
+        return {}
+    def char(ref):
+        code = ref.group(1)
+        return unichr(int(code[1:], 16) if code[0] == "x" else int(code))
+    return dict((m.group(1), CHAR_REF.sub(char, m.group(2) or m.group(3) or ""))
+        for m in ENTITY_DECL.finditer(dtd))
+
+def split_shards(filename, count):
+    """Split the records of a DBLP file into roughly equal byte ranges.
+
+    Returns (prolog, footer, shards) where prolog is everything up to and
+    including the root start tag, footer is the root end tag and shards is
+    a list of (start, end) offsets, each starting at a publication record."""
+    infile = open(filename, "rb")
+    try:
+        size = os.fstat(infile.fileno()).st_size
+        if size == 0:
+            return ("", "", [])
+        mm = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        infile.close()
+    try:
+        m = DOCUMENT_START.search(mm)
+        body_start = mm.find(">", m.start()) + 1 if m else -1
+        body_end = mm.rfind("</")
+        if body_start <= 0 or body_end < body_start:
+            return ("", "", [])
+        bounds = [ body_start ]
+        for k in range(1, count):
+            m = RECORD_START.search(mm, body_start + (body_end - body_start) * k / count, body_end)
+            if m is None:
+                break
+            if m.start() > bounds[-1]:
+                bounds.append(m.start())
+        bounds.append(body_end)
+        shards = [ (bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) ]
+        return (mm[:body_start], mm[body_end:], shards)
+    finally:
+        mm.close()
+
+def read_shard(job):
+    """Parse one shard in a worker process.
+
+    Returns (error, names, columns): the names of the authors in order of
+    first appearance and the (pub_type, year, offsets, author_ids, titles,
+    keys) columns of the publications, whose author ids index into names."""
+    filename, prolog, footer, start, end = job
+    infile = open(filename, "rb")
+    try:
+        infile.seek(start)
+        data = infile.read(end - start)
+    finally:
+        infile.close()
+    db = Database()
+    try:
+        ExpatReader(db).parse(StringIO(prolog + data + footer), filename)
+    except expat.ExpatError as e:
+        return (str(e), None, None)
+    c = db.columns
+    return (None, [ a.name for a in db.authors ],
+        (c.pub_type, c.year, c.offsets, c.author_ids, c.titles, c.keys))
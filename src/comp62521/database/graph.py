@@ -0,0 +1,194 @@
+import itertools
+
+import numpy as np
+
+class CoauthorGraph:
+    """Weighted co-authorship graph of all authors, in CSR form.
+
+    The co-authors of author a are indices[indptr[a]:indptr[a + 1]], in
+    ascending order, and weights holds the matching collaboration counts:
+    how many times the co-author is listed on the publications of a. own[a]
+    is that count for a itself, i.e. its publications plus any publication
+    that lists it more than once."""
+
+    def __init__(self, indptr, indices, weights, own):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.own = own
+
+    @classmethod
+    def build(cls, columns, na):
+        c = columns
+        ids = c.author_ids.astype(np.int64)
+        first = c.first_listings()
+        m = max(na, 1)
+        keys = []
+        counts = []
+        for left, right in c.authorship_pairs():
+            # a publication counts once per author it is listed under
+            keep = first[left]
+            k, w = np.unique(ids[left[keep]] * m + ids[right[keep]], return_counts=True)
+            keys.append(k)
+            counts.append(w)
+        if keys:
+            keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+            weights = np.bincount(inverse, np.concatenate(counts)).astype(np.int64)
+        else:
+            keys = weights = np.zeros(0, dtype=np.int64)
+
+        rows = keys // m
+        cols = keys % m
+        loop = rows == cols
+        own = np.zeros(na, dtype=np.int64)
+        own[rows[loop]] = weights[loop]
+        rows = rows[~loop]
+        indptr = np.zeros(na + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(rows, minlength=na))
+        return cls(indptr, cols[~loop].astype(np.int32), weights[~loop], own)
+
+    def __len__(self):
+        return len(self.own)
+
+    def neighbours(self, a):
+        return self.indices[self.indptr[a]:self.indptr[a + 1]]
+
+    def neighbours_of(self, nodes):
+        """Co-authors of each of the given authors, concatenated."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        starts = self.indptr[nodes]
+        counts = self.indptr[nodes + 1] - starts
+        shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return self.indices[np.arange(counts.sum()) + shift]
+
+    def distance(self, a, b):
+        """Number of edges on a shortest path from a to b, or -1 if they
+        are not connected.
+
+        The search runs breadth first from both ends, a whole level at a
+        time, always growing the side whose frontier has fewer edges, and
+        stops at the first level where the two sides meet."""
+        if a == b:
+            return 0
+        depth = [ np.full(len(self), -1, dtype=np.int32) for _ in range(2) ]
+        depth[0][a] = 0
+        depth[1][b] = 0
+        frontier = [ np.array([a]), np.array([b]) ]
+        level = [0, 0]
+        while len(frontier[0]) and len(frontier[1]):
+            edges = [ int((self.indptr[f + 1] - self.indptr[f]).sum()) for f in frontier ]
+            side = 0 if edges[0] <= edges[1] else 1
+            reached = np.unique(self.neighbours_of(frontier[side]))
+            reached = reached[depth[side][reached] < 0]
+            level[side] += 1
+            depth[side][reached] = level[side]
+            # nodes the other side has seen, at most level[1 - side] away
+            meet = depth[1 - side][reached]
+            meet = meet[meet >= 0]
+            if len(meet):
+                return level[side] + int(meet.min())
+            frontier[side] = reached
+        return -1
+
+    def distances_from(self, a):
+        """Distance from a to every author, -1 where not connected, found
+        by one breadth first search."""
+        depth = np.full(len(self), -1, dtype=np.int32)
+        depth[a] = 0
+        frontier = np.array([a])
+        level = 0
+        while len(frontier):
+            reached = np.unique(self.neighbours_of(frontier))
+            reached = reached[depth[reached] < 0]
+            level += 1
+            depth[reached] = level
+            frontier = reached
+        return depth
+
+    def degree(self):
+        """Number of distinct co-authors of every author."""
+        return np.diff(self.indptr)
+
+    def collaborations(self, a, include_self):
+        """{author id: collaboration count} of the co-authors of a."""
+        lo, hi = self.indptr[a], self.indptr[a + 1]
+        ids = self.indices[lo:hi].tolist()
+        counts = self.weights[lo:hi].tolist()
+        if include_self:
+            i = int(np.searchsorted(self.indices[lo:hi], a))
+            ids.insert(i, a)
+            counts.insert(i, int(self.own[a]))
+        return dict(itertools.izip(ids, counts))
+
+    def edges(self):
+        """(left, right) author ids of every co-author pair, left < right."""
+        left = np.repeat(np.arange(len(self), dtype=np.int32), self.degree())
+        keep = left < self.indices
+        return (left[keep], self.indices[keep])
+
+def first_seen(keys, ranks):
+    """The distinct keys in ascending order, and the smallest rank of each."""
+    order = np.argsort(keys)
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else order
+    ranks = np.minimum.reduceat(ranks[order], starts) if len(keys) else ranks
+    return (keys[starts], ranks)
+
+class CoauthorEdges:
+    """Distinct co-author pairs of the publications of every (year, type)
+    bucket, numbered as by a YearIndex.
+
+    The pairs of bucket k are left[offsets[k]:offsets[k + 1]] and the
+    matching right, sorted. rank is where each pair is first seen walking
+    the publications in order and pairing every author of one with every
+    other, so pairs merged from several buckets can be put back in the
+    order that walk would meet them."""
+
+    def __init__(self, left, right, rank, offsets, na):
+        self.left = left
+        self.right = right
+        self.rank = rank
+        self.offsets = offsets
+        self.na = na
+
+    @classmethod
+    def build(cls, columns, na, years):
+        c = columns
+        ids = c.author_ids.astype(np.int64)
+        pubs = c.authorship_pubs()
+        buckets = years.bucket_of(c.year, c.pub_type)
+        m = max(na, 1)
+        keys = []
+        ranks = []
+        seen = 0
+        for left, right in c.authorship_pairs():
+            keep = ids[left] != ids[right]
+            left = left[keep]
+            right = right[keep]
+            k, r = first_seen((buckets[pubs[left]] * m + ids[left]) * m + ids[right],
+                np.arange(seen, seen + len(left)))
+            keys.append(k)
+            ranks.append(r)
+            seen += len(left)
+        if keys:
+            keys, rank = first_seen(np.concatenate(keys), np.concatenate(ranks))
+        else:
+            keys = rank = np.zeros(0, dtype=np.int64)
+        offsets = np.searchsorted(keys // (m * m), np.arange(len(years) + 1))
+        return cls((keys // m % m).astype(np.int32), (keys % m).astype(np.int32),
+            rank, offsets, na)
+
+    def select(self, buckets):
+        """(left, right) of the distinct pairs of the given buckets, in the
+        order they are first seen."""
+        buckets = np.asarray(buckets, dtype=np.int64)
+        starts = self.offsets[buckets]
+        counts = self.offsets[buckets + 1] - starts
+        shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        edges = np.arange(counts.sum()) + shift
+        m = max(self.na, 1)
+        # a pair in several buckets keeps its earliest rank
+        keys, rank = first_seen(self.left[edges].astype(np.int64) * m + self.right[edges],
+            self.rank[edges])
+        keys = keys[np.argsort(rank)]
+        return (keys // m, keys % m)
@@ -0,0 +1,29 @@
+import numpy as np
+
+class AuthorPublications:
+    """Publications of every author, in CSR form.
+
+    The publications of author a are pubs[indptr[a]:indptr[a + 1]], in
+    ascending order and once each however many times a is listed, so a
+    query about one author costs the size of its own posting list."""
+
+    def __init__(self, indptr, pubs):
+        self.indptr = indptr
+        self.pubs = pubs
+
+    @classmethod
+    def build(cls, columns, na):
+        c = columns
+        first = c.first_listings()
+        ids = c.author_ids[first]
+        # stable, so each list stays in publication order
+        order = np.argsort(ids, kind="mergesort")
+        indptr = np.zeros(na + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(ids, minlength=na))
+        return cls(indptr, c.authorship_pubs()[first][order])
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def of(self, a):
+        return self.pubs[self.indptr[a]:self.indptr[a + 1]]
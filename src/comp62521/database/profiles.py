@@ -0,0 +1,51 @@
+import numpy as np
+
+class AuthorProfiles:
+    """Per-author publication counts, computed for every author at once.
+
+    counts[a, role, t] is the number of publications of type t where
+    author a has the given role. Roles are any authorship, first or last
+    author of a publication with several authors, sole author, and last
+    but not also first author. coauthors counts the distinct co-authors
+    of a."""
+    ALL = 0
+    FIRST = 1
+    LAST = 2
+    SOLE = 3
+    LAST_ONLY = 4
+    # column order of the author pages: overall, then journal articles,
+    # conference papers, books and book chapters
+    PAGE_TYPES = [1, 0, 2, 3]
+
+    def __init__(self, counts, coauthors):
+        self.counts = counts
+        self.coauthors = coauthors
+
+    @classmethod
+    def build(cls, columns, graph):
+        c = columns
+        na = len(graph)
+        pubs = c.authorship_pubs()
+        ids = c.author_ids.astype(np.int64)
+        size = c.author_counts()[pubs]
+        pos = np.arange(c.authorships) - c.offsets[pubs]
+        cells = ids * 4 + c.pub_type[pubs]
+        last = (pos == size - 1) & (size > 1)
+
+        roles = [
+            # an author listed twice on a publication counts it once
+            c.first_listings(),
+            (pos == 0) & (size > 1),
+            last,
+            size == 1,
+            last & (ids != c.author_ids[c.offsets[pubs]]) ]
+        counts = np.column_stack([
+            np.bincount(cells[mask], minlength=na * 4) for mask in roles ])
+        counts = counts.reshape(na, 4, len(roles)).transpose(0, 2, 1)
+
+        return cls(counts, graph.degree())
+
+    def row(self, a, role):
+        """[overall, journal, conference, book, chapter] counts."""
+        counts = self.counts[a, role]
+        return [ int(counts.sum()) ] + [ int(counts[t]) for t in self.PAGE_TYPES ]
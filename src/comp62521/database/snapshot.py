@@ -0,0 +1,201 @@
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+
+# A snapshot is the magic string, the length of a JSON header, the header
+# itself and then the raw arrays, each aligned to 8 bytes. Loading maps
+# the whole file read-only and takes views of it, so nothing is parsed.
+MAGIC = "C62521DB"
+VERSION = 3
+ALIGN = 8
+
+class SnapshotError(Exception):
+    pass
+
+def is_snapshot(filename):
+    try:
+        infile = open(filename, "rb")
+    except IOError:
+        return False
+    try:
+        return infile.read(len(MAGIC)) == MAGIC
+    finally:
+        infile.close()
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def write(filename, meta, arrays):
+    """Write a snapshot of meta, a JSON serialisable dict, and arrays, a
+    dict of NumPy arrays by name, to filename. The file is written beside
+    filename and renamed over it, so a database that has the old one
+    mapped keeps it and readers never see half a file."""
+    arrays = dict((name, np.ascontiguousarray(a)) for name, a in arrays.iteritems())
+    entries = []
+    offset = 0
+    for name in sorted(arrays):
+        a = arrays[name]
+        entries.append([name, a.dtype.str, list(a.shape), offset])
+        offset = _align(offset + a.nbytes)
+    header = json.dumps({"version":VERSION, "meta":dict(meta), "arrays":entries})
+    start = _align(len(MAGIC) + 8 + len(header))
+
+    dirname, basename = os.path.split(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(prefix=basename + ".", suffix=".tmp", dir=dirname)
+    try:
+        # mkstemp makes the file private; give it the mode open() would
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmpname, 0666 & ~umask)
+        outfile = os.fdopen(fd, "wb")
+        try:
+            outfile.write(MAGIC)
+            outfile.write(struct.pack("<Q", len(header)))
+            outfile.write(header)
+            for name, _, _, offset in entries:
+                outfile.write("\0" * (start + offset - outfile.tell()))
+                outfile.write(arrays[name].tostring())
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        finally:
+            outfile.close()
+        os.rename(tmpname, filename)
+    except:
+        os.remove(tmpname)
+        raise
+
+def read(filename):
+    infile = open(filename, "rb")
+    try:
+        if infile.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError("not a snapshot file")
+        (length,) = struct.unpack("<Q", infile.read(8))
+        header = json.loads(infile.read(length))
+    finally:
+        infile.close()
+    if header["version"] != VERSION:
+        raise SnapshotError("unsupported snapshot version %d" % header["version"])
+    start = _align(len(MAGIC) + 8 + length)
+
+    mm = np.memmap(filename, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, dtype, shape, offset in header["arrays"]:
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        # plain arrays over the mapping; indexing a memmap is much slower
+        a = np.frombuffer(mm, dtype, count, start + offset) if count else np.zeros(0, dtype)
+        arrays[name] = a.reshape(shape)
+    return (header["meta"], arrays)
+
+def _to_unicode(s):
+    if isinstance(s, unicode):
+        return s
+    return s.decode("utf-8")
+
+def _to_utf8(s):
+    if isinstance(s, unicode):
+        return s.encode("utf-8")
+    return s
+
+def pack_strings(strings):
+    """Return (offsets, data, missing, order) arrays for a list of strings.
+
+    offsets are byte offsets into the UTF-8 encoded data; missing marks
+    entries that were None; order is the positions of the others sorted
+    by their encoded bytes, for StringIndex."""
+    missing = np.array([ s is None for s in strings ], dtype=np.bool_)
+    encoded = [ "" if s is None else _to_unicode(s).encode("utf-8") for s in strings ]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([ len(s) for s in encoded ], out=offsets[1:])
+    data = np.frombuffer("".join(encoded), dtype=np.uint8)
+    order = np.array(sorted(np.flatnonzero(~missing).tolist(), key=encoded.__getitem__),
+        dtype=np.int64)
+    return (offsets, data, missing, order)
+
+class PackedStrings:
+    """Sequence of strings packed as by pack_strings, e.g. memory mapped
+    from a snapshot. Each is decoded when it is asked for; strings
+    appended later are kept in a list."""
+
+    def __init__(self, offsets, data, missing=None):
+        self.offsets = offsets
+        self.data = data
+        self.missing = missing
+        self.count = len(offsets) - 1
+        self.appended = []
+        self.buffer = buffer(data)
+
+    def __len__(self):
+        return self.count + len(self.appended)
+
+    def encoded(self, i):
+        """The UTF-8 bytes of packed string i."""
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ self[j] for j in xrange(*i.indices(len(self))) ]
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("string index out of range")
+        if i >= self.count:
+            return self.appended[i - self.count]
+        if self.missing is not None and len(self.missing) and self.missing[i]:
+            return None
+        return self.encoded(i).decode("utf-8")
+
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+
+    def append(self, s):
+        self.appended.append(s)
+
+class StringIndex:
+    """Position of every string of a PackedStrings, looked up by binary
+    search over order (see pack_strings) instead of a dict of them all.
+    Positions set later are kept in a dict."""
+
+    def __init__(self, strings, order):
+        self.strings = strings
+        self.order = order
+        self.added = {}
+
+    def __len__(self):
+        return len(self.order) + len(self.added)
+
+    def get(self, s, default=None):
+        if s in self.added:
+            return self.added[s]
+        target = _to_utf8(s)
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.strings.encoded(self.order[mid]) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.order) and self.strings.encoded(self.order[lo]) == target:
+            return int(self.order[lo])
+        return default
+
+    def __contains__(self, s):
+        return self.get(s) is not None
+
+    def __getitem__(self, s):
+        i = self.get(s)
+        if i is None:
+            raise KeyError(s)
+        return i
+
+    def __setitem__(self, s, i):
+        self.added[s] = i
+
+    def keys(self):
+        return [ self.strings[i] for i in self.order.tolist() ] + self.added.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
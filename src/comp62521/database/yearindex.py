@@ -0,0 +1,37 @@
+import numpy as np
+
+class YearIndex:
+    """Numbering of the (year, type) buckets of the publications, so that
+    any filter on a year range and a type is a set of buckets.
+
+    Bucket 4 * y + t holds the publications of type t in year
+    first_year + y, for each of the years from the first to the last."""
+
+    def __init__(self, first_year, years):
+        self.first_year = first_year
+        self.years = years
+
+    @classmethod
+    def build(cls, columns):
+        c = columns
+        first_year = int(c.year.min()) if len(c) else 0
+        ny = int(c.year.max()) - first_year + 1 if len(c) else 0
+        return cls(first_year, ny)
+
+    def __len__(self):
+        return 4 * self.years
+
+    def bucket_of(self, year, pub_type):
+        """Buckets of publications of the given years and types."""
+        return (np.asarray(year, dtype=np.int64) - self.first_year) * 4 + pub_type
+
+    def buckets(self, start_year=None, end_year=None, pub_type=4):
+        """Indices 4 * y + t of the (year, type) runs from start_year to
+        end_year, of pub_type or of any type if it is 4. Either year may be
+        None for no bound."""
+        ny = self.years
+        lo = 0 if start_year is None else min(max(start_year - self.first_year, 0), ny)
+        hi = ny if end_year is None else min(max(end_year - self.first_year + 1, lo), ny)
+        if pub_type == 4:
+            return np.arange(4 * lo, 4 * hi)
+        return np.arange(lo, hi) * 4 + pub_type
@@ -0,0 +1,59 @@
+from comp62521.database import database, snapshot
+import threading
+import time
+
+class Loader(threading.Thread):
+    """Reads a dataset, DBLP XML or a snapshot, into a new Database in the
+    background, so that the server can answer while it loads.
+
+    state is "loading", then "ready" or "failed". on_loaded(db) is called
+    once the data is in, before the state becomes ready. The loader lets
+    go of the database when it is done, so that it does not keep it alive
+    after it has been replaced. cache_budget is that of the Database."""
+
+    def __init__(self, filename, on_loaded=None, cache_budget=database.DEFAULT_BUDGET):
+        threading.Thread.__init__(self, name="loader")
+        self.daemon = True
+        self.filename = filename
+        self.on_loaded = on_loaded
+        self.db = database.Database(cache_budget)
+        self.publications = 0
+        self.authors = 0
+        self.state = "loading"
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self.done = threading.Event()
+
+    def run(self):
+        try:
+            if snapshot.is_snapshot(self.filename):
+                valid = self.db.load_snapshot(self.filename)
+            else:
+                valid = self.db.read(self.filename)
+            if valid == False:
+                raise ValueError("cannot read %s" % self.filename)
+            if self.on_loaded is not None:
+                self.on_loaded(self.db)
+            self.state = "ready"
+        except Exception as e:
+            print "Error loading dataset (" + str(e) + ")"
+            self.error = str(e)
+            self.state = "failed"
+        finally:
+            self.publications = len(self.db.publications)
+            self.authors = len(self.db.authors)
+            self.db = None
+            self.finished = time.time()
+            self.done.set()
+
+    def status(self):
+        """The state and how far the load has got."""
+        end = self.finished or time.time()
+        db = self.db
+        return {
+            "state":self.state,
+            "publications":self.publications if db is None else len(db.publications),
+            "authors":self.authors if db is None else len(db.authors),
+            "seconds":round(end - self.started, 1),
+            "error":self.error }
@@ -1,37 +1,59 @@
+import numpy as np
+
+# counts of small non-negative integers are taken with bincount when the
+# largest value is below this bound or the number of values
+BINCOUNT_LIMIT = 1 << 16
 
 def mean(X):
+    X = np.asarray(X)
     n = len(X)
     if n > 0:
-        return float(sum(X)) / float(len(X))
+        if X.dtype.kind in "biu":
+            total = X.sum(dtype=np.int64)
+        else:
+            # left to right, like sum(), so floats round the same way
+            total = sum(X.tolist())
+        return float(total) / float(n)
     return 0
 
 
 def median(X):
+    X = np.asarray(X)
     n = len(X)
     if n == 0:
         return 0
-    L = sorted(X)
+    k = n / 2
     if n % 2:
-        return L[n / 2]
-    return mean(L[(n / 2) - 1:(n / 2) + 1])
+        return np.partition(X, k)[k].item()
+    L = np.partition(X, [k - 1, k])
+    return mean(L[k - 1:k + 1])
+
+def counts(X):
+    """Distinct values of X in ascending order and how often each occurs."""
+    X = np.asarray(X)
+    if X.dtype.kind in "biu" and len(X) and X.min() >= 0 \
+            and X.max() < max(BINCOUNT_LIMIT, len(X)):
+        c = np.bincount(X)
+        values = np.flatnonzero(c)
+        return (values.astype(X.dtype), c[values])
+    return np.unique(X, return_counts=True)
+
+def dict_order(keys, first):
+    """keys in the order a dict lists them, when each was inserted at the
+    index it first occurs at in first."""
+    return dict.fromkeys(keys[np.argsort(first, kind="mergesort")].tolist()).keys()
 
 def mode(X):
     n = len(X)
     if n == 0:
         return []
 
-    d = {}
-    for item in X:
-        if d.has_key(item):
-            d[item] += 1
-        else:
-            d[item] = 1
-
-    m = []
-    for key in d.keys():
-        if m == [] or d[key] > d[m[0]]:
-            m = [key]
-        elif d[key] == d[m[0]]:
-            m.append(key)
-
+    values, c = counts(X)
+    m = values[c == c.max()].tolist()
+    if len(m) > 1:
+        # ties are listed in the order of a dict counting X, as they
+        # always have been; only the order keys were first seen matters
+        first = np.unique(X, return_index=True)[1]
+        modes = set(m)
+        m = [ key for key in dict_order(values, first) if key in modes ]
     return m
@@ -0,0 +1,112 @@
+"""mean, median and mode of every group of a set of values at once.
+
+Each function takes the group of every value, the values and the number
+of groups, and returns one result per group: the same as calling the
+function of the same name in comp62521.statistics.average on the values
+of each group, in their original order."""
+from comp62521.statistics import average
+import numpy as np
+
+# a dict this small or larger lists any keys below it in ascending order
+DICT_MINSIZE = 8
+
+def split(groups, values, ngroups):
+    """values sorted by group, keeping their order within each group, and
+    the bounds of each group."""
+    groups = np.asarray(groups, dtype=np.int64)
+    order = np.argsort(groups, kind="mergesort")
+    bounds = np.searchsorted(groups[order], np.arange(ngroups + 1))
+    return (np.asarray(values)[order], bounds)
+
+def _bounds(groups, ngroups):
+    sizes = np.bincount(groups, minlength=ngroups)
+    return np.concatenate(([0], np.cumsum(sizes)))
+
+def _sort_groups(groups, values, ngroups):
+    """values sorted by group and then by value, the group of each and
+    the bounds of each group."""
+    groups = np.asarray(groups, dtype=np.int64)
+    values = np.asarray(values)
+    if values.dtype.kind in "biu" and len(values):
+        # one sort of a combined key is much faster than lexsort
+        lo = int(values.min())
+        span = int(values.max()) - lo + 1
+        order = np.argsort(groups * span + (values.astype(np.int64) - lo))
+    else:
+        order = np.lexsort((values, groups))
+    return (values[order], groups[order], _bounds(groups, ngroups))
+
+def mean(groups, values, ngroups):
+    groups = np.asarray(groups, dtype=np.int64)
+    values = np.asarray(values)
+    if values.dtype.kind not in "biu":
+        values, bounds = split(groups, values, ngroups)
+        return [ average.mean(values[bounds[i]:bounds[i + 1]]) for i in range(ngroups) ]
+    sizes = np.bincount(groups, minlength=ngroups)
+    # integer totals are exact in a float64 below 2 ** 53
+    totals = np.bincount(groups, values, minlength=ngroups)
+    result = (totals / np.maximum(sizes, 1)).tolist()
+    for i in np.flatnonzero(sizes == 0).tolist():
+        result[i] = 0
+    return result
+
+def median(groups, values, ngroups):
+    if len(values) == 0:
+        return [0] * ngroups
+    values, _, bounds = _sort_groups(groups, values, ngroups)
+    sizes = np.diff(bounds)
+    last = len(values) - 1
+    middle = np.minimum(bounds[:-1] + sizes // 2, last)
+    upper = values[middle]
+    lower = values[np.maximum(middle - 1, 0)]
+    if values.dtype.kind in "biu":
+        halves = (lower.astype(np.int64) + upper) / 2.0
+    else:
+        halves = np.array([ average.mean([a, b]) for a, b in zip(lower, upper) ])
+    upper = upper.tolist()
+    halves = halves.tolist()
+    return [ 0 if n == 0 else upper[i] if n % 2 else halves[i]
+        for i, n in enumerate(sizes.tolist()) ]
+
+def mode(groups, values, ngroups):
+    result = [ [] for _ in range(ngroups) ]
+    if len(values) == 0:
+        return result
+    ordered, owner, bounds = _sort_groups(groups, values, ngroups)
+
+    # runs of one value within one group
+    starts = np.ones(len(ordered), dtype=np.bool_)
+    starts[1:] = (ordered[1:] != ordered[:-1]) | (owner[1:] != owner[:-1])
+    starts = np.flatnonzero(starts)
+    counts = np.diff(np.append(starts, len(ordered)))
+    run_group = owner[starts]
+    first_run = np.searchsorted(run_group, np.arange(ngroups))
+    nonempty = np.diff(bounds) > 0
+    best = np.zeros(ngroups, dtype=counts.dtype)
+    best[nonempty] = np.maximum.reduceat(counts, first_run[nonempty])
+    top = counts == best[run_group]
+
+    for g, v in zip(run_group[top].tolist(), ordered[starts[top]].tolist()):
+        result[g].append(v)
+
+    # ties are listed in dict order, which is ascending only for small
+    # non-negative integers; anything else is counted with a dict
+    ties = np.flatnonzero(np.bincount(run_group[top], minlength=ngroups) > 1)
+    if len(ties):
+        if ordered.dtype.kind in "biu":
+            lo = ordered[bounds[ties]]
+            hi = ordered[bounds[ties + 1] - 1]
+            ties = ties[(lo < 0) | (hi >= DICT_MINSIZE)]
+        if len(ties):
+            values, bounds = split(groups, values, ngroups)
+        for g in ties.tolist():
+            result[g] = dict_mode(values[bounds[g]:bounds[g + 1]].tolist())
+    return result
+
+def dict_mode(X):
+    """average.mode counting with a dict; quicker for a short list."""
+    d = {}
+    for item in X:
+        d[item] = d.get(item, 0) + 1
+    top = max(d.itervalues())
+    return [ key for key in d if d[key] == top ]
@@ -0,0 +1,67 @@
+"""mean, median and mode of a vector of n values that are mostly zero.
+
+Each function takes the positions of the non-zero values in ascending
+order, those values and n, and returns the same as the function of the
+same name in comp62521.statistics.average on the whole vector, without
+ever building it."""
+from comp62521.statistics import average
+import numpy as np
+
+def mean(index, values, n):
+    if n == 0:
+        return 0
+    values = np.asarray(values)
+    if values.dtype.kind in "biu":
+        total = values.sum(dtype=np.int64)
+    else:
+        total = sum(values.tolist())
+    return float(total) / float(n)
+
+def median(index, values, n):
+    if n == 0:
+        return 0
+    values = np.sort(values)
+    negative = int(np.searchsorted(values, 0))
+    zeros = n - len(values)
+
+    def at(k):
+        # the sorted vector is the negative values, the zeros, then the rest
+        if k < negative:
+            return values[k].item()
+        if k < negative + zeros:
+            return values.dtype.type(0).item()
+        return values[k - zeros].item()
+
+    k = n / 2
+    if n % 2:
+        return at(k)
+    return average.mean([at(k - 1), at(k)])
+
+def first_zero(index):
+    """Position of the first zero, given the positions of the non-zero
+    values, assuming there is one."""
+    gaps = np.flatnonzero(np.asarray(index) != np.arange(len(index)))
+    return int(gaps[0]) if len(gaps) else len(index)
+
+def mode(index, values, n):
+    if n == 0:
+        return []
+    values = np.asarray(values)
+    keys, c = average.counts(values)
+    zeros = n - len(values)
+    if zeros:
+        z = int(np.searchsorted(keys, 0))
+        keys = np.insert(keys, z, 0)
+        c = np.insert(c, z, zeros)
+
+    m = keys[c == c.max()].tolist()
+    if len(m) > 1:
+        # ties in the order average.mode gives them, which depends on
+        # where each value first occurs
+        first = np.zeros(len(keys), dtype=np.int64)
+        first[keys != 0] = np.asarray(index)[np.unique(values, return_index=True)[1]]
+        if zeros:
+            first[z] = first_zero(index)
+        modes = set(m)
+        m = [ key for key in average.dict_order(keys, first) if key in modes ]
+    return m
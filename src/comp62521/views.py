@@ -1,6 +1,11 @@
 from comp62521 import app
+from comp62521.loader import Loader
+from comp62521.warmup import Warmup
 from database import database
-from flask import (render_template, request)
+from flask import (Response, abort, jsonify, render_template, request,
+    stream_with_context)
+import hmac
+import threading
 
 def format_data(data):
     fmt = "%.2f"
@@ -12,6 +17,128 @@ def format_data(data):
             result.append((fmt % item).rstrip('0').rstrip('.'))
     return result
 
+def default_queries(db):
+    """The queries behind the default /averages, /statisticsdetails,
+    /coauthors and /stats pages, as (method name, arguments) for Warmup.
+
+    On large data the whole tables may not fit in the result cache, so the
+    derived structures and the arrays the co-author pages are sliced from
+    are built as well. They come last, so the tables cannot push them out."""
+    queries = []
+    for name in [ "get_average_authors_per_publication", "get_average_publications_per_author",
+            "get_average_publications_in_a_year", "get_average_authors_in_a_year" ]:
+        for av in [ database.Stat.MEAN, database.Stat.MEDIAN, database.Stat.MODE ]:
+            queries.append((name, (av,)))
+    queries += [
+        ("get_publication_summary", ("", 0)),
+        ("get_publications_by_author", ("", 0)),
+        ("get_publications_by_year", ("", 0)),
+        ("get_author_totals_by_year", ()),
+        ("get_coauthor_data", (db.min_year, db.max_year, 4, "", 0)),
+        ("get_stats_for_author", ("", "", 0)),
+        ("build_indexes", ()),
+        ("_coauthor_rows", (db.min_year, db.max_year, 4)),
+        ("_coauthor_order", (db.min_year, db.max_year, 4, "", 0)) ]
+    return queries
+
+# pages that do not need the data, served while it loads; a reload can
+# also replace data that failed to load
+LOADING_ENDPOINTS = ("static", "showStatus", "showReady", "showStatisticsMenu", "indexPage",
+    "reloadData")
+
+@app.before_request
+def checkLoaded():
+    """While a Loader started by main.py is reading the data, data pages
+    say so instead."""
+    loader = app.config.get('LOADER')
+    if loader is None or loader.state == "ready" or request.endpoint in LOADING_ENDPOINTS:
+        return None
+    args = {"dataset":app.config['DATASET'], "status":loader.status()}
+    return (render_template("loading.html", args=args),
+        500 if loader.state == "failed" else 503)
+
+@app.route("/status")
+def showStatus():
+    """The progress of the Loader started by main.py, if any, and of the
+    last reload."""
+    loader = app.config.get('LOADER')
+    status = {"state":"ready"} if loader is None else loader.status()
+    reloader = app.config.get('RELOADER')
+    if reloader is not None:
+        status["reload"] = reloader.status()
+    return jsonify(**status)
+
+# one reload at a time
+reload_lock = threading.Lock()
+
+def swap_database(db):
+    """Put db in place of the current database, after warming it up if
+    main.py warms up. A request that is running keeps the database it
+    started with, and the old one is freed when the last of them ends.
+    The first load is over once a reload is in, even if it failed."""
+    if app.config.get('WARMUP') is not None:
+        warmup = Warmup(db, default_queries(db))
+        warmup.run()
+        app.config['WARMUP'] = warmup
+    app.config['DATABASE'] = db
+    app.config['LOADER'] = None
+
+def start_reload():
+    """Read DATA_FILE again into a new Database in the background, which
+    replaces the current one once it is ready. Returns the Loader, or None
+    if the data is still being loaded or reloaded."""
+    with reload_lock:
+        for loader in [ app.config.get('LOADER'), app.config.get('RELOADER') ]:
+            if loader is not None and not loader.done.is_set():
+                return None
+        reloader = Loader(app.config['DATA_FILE'], swap_database,
+            app.config.get('CACHE_BUDGET', database.DEFAULT_BUDGET))
+        app.config['RELOADER'] = reloader
+        reloader.start()
+        return reloader
+
+# addresses a reload may come from when no RELOAD_TOKEN is set
+LOCAL_ADDRESSES = ("127.0.0.1", "::1")
+
+def reload_allowed():
+    """Whether the request may reload the data: it must carry RELOAD_TOKEN
+    in an X-Reload-Token header if one is set, or come from this machine
+    otherwise."""
+    token = app.config.get('RELOAD_TOKEN')
+    if not token:
+        return request.remote_addr in LOCAL_ADDRESSES
+    if isinstance(token, unicode):
+        token = token.encode("utf-8")
+    given = request.headers.get("X-Reload-Token", u"").encode("utf-8")
+    return hmac.compare_digest(given, token)
+
+@app.route("/reload", methods=["POST"])
+def reloadData():
+    """Reload the data file without stopping; see start_reload."""
+    if not reload_allowed():
+        abort(403)
+    if app.config.get('DATA_FILE') is None:
+        abort(400)
+    reloader = start_reload()
+    if reloader is None:
+        return (jsonify(state="loading"), 409)
+    return (jsonify(**reloader.status()), 202)
+
+@app.route("/ready")
+def showReady():
+    """Whether the data loaded and warmed up by main.py, if it does either,
+    is ready. It is not while any warmed up result could not be kept in
+    the cache; uncached names those queries."""
+    loader = app.config.get('LOADER')
+    warmup = app.config.get('WARMUP')
+    ready = (loader is None or loader.state == "ready") and (
+        warmup is None or warmup.ready.is_set())
+    status = {}
+    if ready and warmup is not None and warmup.uncached:
+        ready = False
+        status["uncached"] = [ name for name, _ in warmup.uncached ]
+    return (jsonify(ready=ready, **status), 200 if ready else 503)
+
 @app.route("/averages")
 def showAverages():
     dataset = app.config['DATASET']
@@ -88,7 +215,19 @@ def showCoAuthors():
     if "pub_type" in request.args:
         pub_type = int(request.args.get("pub_type"))
 
-    args["data"] = db.get_coauthor_data(start_year, end_year, pub_type, key_name, descending)
+    if "page" in request.args:
+        page = max(int(request.args.get("page")), 1)
+        size = max(int(request.args.get("size", 50)), 1)
+        header, data, total = db.get_coauthor_page(start_year, end_year, pub_type,
+            key_name, descending, page, size)
+        args["data"] = (header, data)
+        args["page"] = page
+        args["size"] = size
+        args["pages"] = max((total + size - 1) // size, 1)
+        args["key_name"] = key_name
+        args["sort_descending"] = descending
+    else:
+        args["data"] = db.get_coauthor_data(start_year, end_year, pub_type, key_name, descending)
     args["start_year"] = start_year
     args["end_year"] = end_year
     args["pub_type"] = pub_type
@@ -99,6 +238,35 @@ def showCoAuthors():
     args["pub_str"] = PUB_TYPES[pub_type]
     return render_template("coauthors.html", args=args)
 
+@app.route("/coauthors/author")
+def showCoAuthorsOf():
+    """The co-authors of author_name in the same filter as /coauthors, as
+    JSON, for expanding one row at a time."""
+    db = app.config['DATABASE']
+    if not request.args.has_key('author_name'):
+        abort(400)
+    name = request.args['author_name']
+    if name not in db.author_idx:
+        abort(404)
+    start_year = int(request.args.get("start_year", db.min_year))
+    end_year = int(request.args.get("end_year", db.max_year))
+    pub_type = int(request.args.get("pub_type", 4))
+    return jsonify(author=name,
+        coauthors=db.get_coauthors_in(name, start_year, end_year, pub_type))
+
+def top_limit():
+    """The number of rows asked for by ?top=N, which shows only the first
+    rows of a sorted table, or None for all of them."""
+    if not request.args.has_key('top'):
+        return None
+    try:
+        limit = int(request.args['top'])
+    except ValueError:
+        abort(400)
+    if limit <= 0:
+        abort(400)
+    return limit
+
 @app.route("/")
 def showStatisticsMenu():
     dataset = app.config['DATASET']
@@ -125,13 +293,16 @@ def showPublicationSummary(status):
         descending = int(request.args['descending'])
     if request.args.has_key('key_name'):
         args["descending"][key_name] = 1-descending
+    limit = top_limit()
+    if limit is not None:
+        args["top"] = limit
     if (status == "publication_summary"):
         args["title"] = "Publication Summary"
         args["data"] = db.get_publication_summary(key_name,descending)
         return render_template('statistics_details_sortable.html', args=args)
     elif (status == "publication_author"):
         args["title"] = "Author Publication"
-        args["data"] = db.get_publications_by_author(key_name, descending)
+        args["data"] = db.get_publications_by_author(key_name, descending, limit)
         return render_template('statistics_details_author.html', args=args)
     elif (status == "publication_year"):
         args["title"] = "Publication by Year"
@@ -161,11 +332,14 @@ def showStats():
         descending = int(request.args['descending'])
     if request.args.has_key('key_name'):
         args["descending"][key_name] = 1-descending
+    limit = top_limit()
+    if limit is not None:
+        args["top"] = limit
     #searching attributes
     author_name = ""
     if request.args.has_key('author_name'):
         author_name = request.args['author_name']
-    args["data"]=db.get_stats_for_author(author_name, key_name, descending)
+    args["data"]=db.get_stats_for_author(author_name, key_name, descending, limit)
     args["author_name"] = author_name
     return render_template('stats_for_author.html',args=args)
 
@@ -213,23 +387,15 @@ def showNewPage(name):
         tables = []
         headers = ["overall","journal articles","conference papers","books","book chapters"]
         headers2 = ["","overall","journal articles","conference papers","books","book chapters"]
-        data1 = db.get_authors_pages_publications(name)
-        data2 = db.get_authors_pages_first_author(name)
-        Data2 = []
-        Data2.append("First author")
-        for i in range(0,5):
-            Data2.append(data2[i])
-        data3 = db.get_authors_pages_last_author(name)
-        Data3 = []
-        Data3.append("Last author")
-        for i in range(0,5):
-            Data3.append(data3[i])
-        data4 = db.get_authors_pages_sole_author(name)
-        Data4 = []
-        Data4.append("Sole author")
-        for i in range(0,5):
-            Data4.append(data4[i])
-        data5 = db.get_authors_pages_coauthors(name)
+        profile = db.get_author_profile(name)
+        data1 = profile["publications"]
+        data2 = profile["first"]
+        Data2 = ["First author"] + data2
+        data3 = profile["last"]
+        Data3 = ["Last author"] + data3
+        data4 = profile["sole"]
+        Data4 = ["Sole author"] + data4
+        data5 = profile["coauthors"]
         tables.append({
             "id":1,
             "title":"Summary",
@@ -282,10 +448,39 @@ def showDegrees():
     args["author_name_1"] = author_name_1
     args["author_name_2"] = author_name_2
     if len(author_name_1) > 0 and len(author_name_2) > 0:
-        R = []
-        t = 0
-        M = []
-        args["data"] = db.degrees_of_separation(author_name_1,author_name_2,t,R,M)
+        args["data"] = db.degrees_of_separation(author_name_1,author_name_2)
     else:
         args["data"] = db.return_null()
     return render_template("degrees_of_separation.html",args=args)
+
+@app.route("/degrees/batch", methods=["GET", "POST"])
+def streamDegrees():
+    """Degrees of separation for many authors, as tab separated lines.
+
+    A GET takes author_name_1 and any number of author_name_2, or every
+    other author if there are none. A POST takes one pair of names per
+    line of the body, separated by a tab. Rows are sent as they are
+    computed."""
+    db = app.config['DATABASE']
+    if request.method == "POST":
+        lines = request.get_data().decode("utf-8").splitlines()
+        pairs = [ tuple(line.split("\t")) for line in lines if line.strip() ]
+        if any(len(pair) != 2 for pair in pairs):
+            abort(400)
+        rows = db.degrees_of_separation_batch(pairs)
+        names = [ name for pair in pairs for name in pair ]
+    else:
+        if not request.args.has_key('author_name_1'):
+            abort(400)
+        author = request.args['author_name_1']
+        targets = request.args.getlist('author_name_2') or None
+        rows = db.degrees_of_separation_from(author, targets)
+        names = [author] + (targets or [])
+    if any(name not in db.author_idx for name in names):
+        abort(404)
+
+    def generate():
+        yield "Author 1\tAuthor 2\tDegrees_of_Separation\n"
+        for row in rows:
+            yield (u"%s\t%s\t%s\n" % row).encode("utf-8")
+    return Response(stream_with_context(generate()), mimetype="text/tab-separated-values")
@@ -0,0 +1,45 @@
+import threading
+
+class Warmup(threading.Thread):
+    """Runs database queries in the background, so that their results are
+    cached before any request needs them.
+
+    queries is a list of (method name, arguments). ready is set once every
+    query has run, whether or not it succeeded, and the database is let go
+    of then. uncached is then the queries of cached methods whose results
+    did not fit in the cache, or were pushed out of it by later ones."""
+
+    def __init__(self, db, queries):
+        threading.Thread.__init__(self, name="warmup")
+        self.daemon = True
+        self.db = db
+        self.queries = queries
+        self.uncached = []
+        self.ready = threading.Event()
+
+    def run(self):
+        try:
+            for name, args in self.queries:
+                try:
+                    getattr(self.db, name)(*args)
+                except Exception as e:
+                    # the request will compute it, and report the error
+                    print "Warning: warm-up of %s%r failed (%s)" % (name, args, e)
+            self.uncached = [ (name, args) for name, args in self.queries
+                if not self._kept(name, args) ]
+            for name, args in self.uncached:
+                print "Warning: the result of %s%r is not cached" % (name, args)
+        finally:
+            self.db = None
+            self.ready.set()
+
+    def _kept(self, name, args):
+        method = getattr(self.db, name)
+        key = getattr(method, "cache_key", None)
+        if key is None:
+            # not a cached query, e.g. one building derived structures
+            return True
+        try:
+            return self.db.results.holds(key(self.db, *args), self.db.version)
+        except TypeError:
+            return False
@@ -1,21 +1,58 @@
-from comp62521 import app
-from comp62521.database import (database, mock_database)
+from comp62521 import app, views
+from comp62521.loader import Loader
+from comp62521.warmup import Warmup
+from comp62521.database import (database, mock_database, snapshot)
+import signal
 import sys
 import os
 
+def load(data_file):
+    """Read data_file, in the foreground, into the app. The database is
+    only referenced from the app config, so a reload can free it."""
+    db = database.Database(app.config.get('CACHE_BUDGET', database.DEFAULT_BUDGET))
+    if snapshot.is_snapshot(data_file):
+        if db.load_snapshot(data_file) == False:
+            sys.exit(1)
+    elif db.read(data_file) == False:
+        sys.exit(1)
+    loaded(db)
+
+def loaded(db):
+    if len(sys.argv) > 2:
+        print "Saving snapshot to %s" % sys.argv[2]
+        db.save_snapshot(sys.argv[2])
+    app.config['DATABASE'] = db
+
+    # compute the default pages in the background; /ready reports when done
+    if "WARMUP" in os.environ:
+        warmup = Warmup(db, views.default_queries(db))
+        app.config['WARMUP'] = warmup
+        warmup.start()
+
+# megabytes of query results kept per database
+if "CACHE_BUDGET" in os.environ:
+    app.config['CACHE_BUDGET'] = int(os.environ["CACHE_BUDGET"]) << 20
+
 if len(sys.argv) == 1:
     dataset = "Mock"
-    db = mock_database.MockDatabase()
+    app.config['DATABASE'] = mock_database.MockDatabase()
 else:
     data_file = sys.argv[1]
     path, dataset = os.path.split(data_file)
     print "Database: path=%s name=%s" % (path, dataset)
-    db = database.Database()
-    if db.read(data_file) == False:
-        sys.exit(1)
+    app.config['DATA_FILE'] = data_file
+    # a SIGHUP reloads the data without stopping, as POST /reload does
+    signal.signal(signal.SIGHUP, lambda signum, frame: views.start_reload())
+    if "LAZY" in os.environ:
+        # serve straight away; /status reports how far the load has got
+        loader = Loader(data_file, loaded,
+            app.config.get('CACHE_BUDGET', database.DEFAULT_BUDGET))
+        app.config['LOADER'] = loader
+        loader.start()
+    else:
+        load(data_file)
 
 app.config['DATASET'] = dataset
-app.config['DATABASE'] = db
 
 if "DEBUG" in os.environ:
     app.config['DEBUG'] = True
@@ -23,4 +60,9 @@ if "DEBUG" in os.environ:
 if "TESTING" in os.environ:
     app.config['TESTING'] = True
 
-app.run(host='0.0.0.0', port=9292)
+# POST /reload is only taken from this machine unless it carries the token
+if "RELOAD_TOKEN" in os.environ:
+    app.config['RELOAD_TOKEN'] = os.environ["RELOAD_TOKEN"]
+
+# queries do not modify the database, so requests can run side by side
+app.run(host='0.0.0.0', port=9292, threaded=True)
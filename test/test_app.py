@@ -1,6 +1,8 @@
 from os import path
+import json
 import unittest
 import comp62521
+from comp62521.database import database
 
 class TestApp(unittest.TestCase):
 
@@ -16,5 +18,53 @@ class TestApp(unittest.TestCase):
         r = self.app.get("/")
         self.assertEqual(200, r.status_code, "Status code was not 'OK'.")
 
+    def test_coauthors_paged(self):
+        db = database.Database()
+        for i in range(3):
+            db.add_publication(database.Publication.JOURNAL, "T", 2000,
+                [ "AUTHOR%d" % i, "AUTHOR%d" % (i + 1) ])
+        comp62521.app.config['DATABASE'] = db
+        r = self.app.get("/coauthors?page=2&size=3&key_name=author")
+        self.assertEqual(200, r.status_code)
+        self.assertTrue("Page 2 of 2" in r.data)
+        self.assertTrue("AUTHOR3 (1)" in r.data)
+        self.assertFalse("AUTHOR0 (1)</a>" in r.data)
+        # rows give the number of co-authors, and expand on demand
+        self.assertTrue('1 <a href="#" class="expand" data-author="AUTHOR3">' in r.data)
+        self.assertFalse("AUTHOR2 (2)" in r.data)
+        r = self.app.get("/coauthors/author?author_name=AUTHOR1")
+        self.assertEqual(json.loads(r.data)["coauthors"], [ "AUTHOR0 (1)", "AUTHOR2 (2)" ])
+        self.assertEqual(404, self.app.get("/coauthors/author?author_name=X").status_code)
+
+    def test_top_authors(self):
+        db = database.Database()
+        db.add_publication(database.Publication.JOURNAL, "T", 2000, [ "AUTHOR0", "AUTHOR1" ])
+        db.add_publication(database.Publication.JOURNAL, "T", 2001, [ "AUTHOR1" ])
+        comp62521.app.config['DATABASE'] = db
+        r = self.app.get("/statisticsdetails/publication_author?key_name=total&descending=1&top=1")
+        self.assertEqual(200, r.status_code)
+        self.assertTrue(">AUTHOR1</a>" in r.data)
+        self.assertFalse(">AUTHOR0</a>" in r.data)
+        self.assertTrue("&top=1" in r.data)
+        for top in [ "0", "-1", "x" ]:
+            self.assertEqual(400, self.app.get("/statisticsdetails/publication_author?top=" + top).status_code)
+            self.assertEqual(400, self.app.get("/stats?top=" + top).status_code)
+
+    def test_degrees_batch(self):
+        db = database.Database()
+        for i in range(3):
+            db.add_publication(database.Publication.JOURNAL, "T", 2000,
+                [ "AUTHOR%d" % i, "AUTHOR%d" % (i + 1) ])
+        comp62521.app.config['DATABASE'] = db
+        r = self.app.get("/degrees/batch?author_name_1=AUTHOR0")
+        self.assertEqual(200, r.status_code)
+        self.assertEqual(r.data.splitlines(), [ "Author 1\tAuthor 2\tDegrees_of_Separation",
+            "AUTHOR0\tAUTHOR1\t0", "AUTHOR0\tAUTHOR2\t1", "AUTHOR0\tAUTHOR3\t2" ])
+        r = self.app.post("/degrees/batch", data="AUTHOR3\tAUTHOR0\nAUTHOR1\tAUTHOR2\nAUTHOR3\tAUTHOR3\n")
+        self.assertEqual(r.data.splitlines()[1:], [ "AUTHOR3\tAUTHOR0\t2",
+            "AUTHOR3\tAUTHOR3\tX", "AUTHOR1\tAUTHOR2\t0" ])
+        r = self.app.get("/degrees/batch?author_name_1=AUTHOR0&author_name_2=NOBODY")
+        self.assertEqual(404, r.status_code)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from comp62521.statistics import average
 
 class TestAverage(unittest.TestCase):
@@ -49,5 +51,27 @@ class TestAverage(unittest.TestCase):
     def test_mode_is_sorted_for_multiple_values(self):
         self.assertEqual(average.mode([2, 2, 1, 1]), [1, 2])
 
+    def test_mean_of_array(self):
+        self.assertEqual(average.mean(np.array([1, 2], dtype=np.int8)), 1.5)
+
+    def test_median_of_array(self):
+        self.assertEqual(average.median(np.array([3, 1, 2])), 2)
+        self.assertEqual(average.median(np.array([4, 0, 3, 1])), 2)
+
+    def test_mode_of_array(self):
+        self.assertEqual(average.mode(np.array([3, 1, 3, 2])), [3])
+        self.assertEqual(average.mode(np.array([-1, 5, -1])), [-1])
+        self.assertEqual(average.mode([0.5, 0.25, 0.5]), [0.5])
+
+    def test_mode_keeps_dict_order_for_ties(self):
+        # a counting dict lists 8 before 1
+        self.assertEqual(average.mode([1, 8, 1, 8]), [8, 1])
+        self.assertEqual(average.mode(np.array([8, 1, 8, 1])), [8, 1])
+
+    def test_counts(self):
+        values, counts = average.counts([3, 1, 3, 70000])
+        self.assertEqual(values.tolist(), [1, 3, 70000])
+        self.assertEqual(counts.tolist(), [1, 2, 1])
+
 if __name__ == '__main__':
     unittest.main()
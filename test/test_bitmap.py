@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+
+from comp62521.database.bitmap import AuthorSet
+
+class TestBitmap(unittest.TestCase):
+
+    def test_from_ids(self):
+        s = AuthorSet.from_ids([0, 3, 8, 9, 20], 21)
+        self.assertEqual(len(s.bits), 3)
+        self.assertEqual(len(s), 5)
+        self.assertEqual(s.bits.tolist(), [0x90, 0xc0, 0x08])
+
+    def test_union(self):
+        a = AuthorSet.from_ids([1, 2, 15], 16)
+        b = AuthorSet.from_ids([2, 7], 16)
+        self.assertEqual(len(AuthorSet.union([a, b, AuthorSet.empty(16)], 16)), 4)
+        self.assertEqual(len(a), 3)
+        a |= b
+        self.assertEqual(len(a), 4)
+        self.assertEqual(a.bits.tolist(), [0x61, 0x01])
+
+    def test_matches_numpy(self):
+        rng = np.random.RandomState(0)
+        ids = np.unique(rng.randint(0, 100000, 30000))
+        s = AuthorSet.from_ids(ids, 100000)
+        self.assertEqual(len(s), len(ids))
+        self.assertEqual(np.flatnonzero(np.unpackbits(s.bits)).tolist(), ids.tolist())
+
+    def test_empty(self):
+        s = AuthorSet.from_ids([], 0)
+        self.assertEqual(len(s), 0)
+        self.assertEqual(s.bits.tolist(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import sys
+import unittest
+import numpy as np
+
+from comp62521.database.cache import ResultCache, cached, footprint
+
+class Source:
+    def __init__(self, budget=1 << 20):
+        self.results = ResultCache(budget)
+        self.version = 0
+        self.calls = 0
+
+    @cached
+    def query(self, n, fill=0):
+        self.calls += 1
+        return [ fill ] * n
+
+class TestCache(unittest.TestCase):
+
+    def test_hit(self):
+        s = Source()
+        self.assertEqual(s.query(3), [0, 0, 0])
+        self.assertEqual(s.query(3), [0, 0, 0])
+        self.assertEqual(s.calls, 1)
+        self.assertEqual(s.query(n=3, fill=0), [0, 0, 0])
+        self.assertEqual(s.calls, 1)
+        self.assertEqual(s.query(3, fill=1), [1, 1, 1])
+        self.assertEqual(s.calls, 2)
+        self.assertEqual(s.query.__name__, "query")
+
+    def test_version(self):
+        s = Source()
+        s.query(3)
+        s.version += 1
+        s.query(3)
+        self.assertEqual(s.calls, 2)
+        self.assertEqual(len(s.results), 1)
+
+    def test_holds(self):
+        s = Source(budget=footprint([0] * 10))
+        s.query(3)
+        s.query(100)
+        self.assertTrue(s.results.holds(s.query.cache_key(s, n=3), 0))
+        self.assertFalse(s.results.holds(s.query.cache_key(s, 100), 0))
+        self.assertFalse(s.results.holds(s.query.cache_key(s, 3), 1))
+
+    def test_unhashable(self):
+        s = Source()
+        s.query(2, fill=[1])
+        s.query(2, fill=[1])
+        self.assertEqual(s.calls, 2)
+        self.assertEqual(len(s.results), 0)
+
+    def test_lru(self):
+        s = Source(budget=3 * footprint([0] * 10))
+        for n in [10, 10, 10]:
+            s.query(n, fill=len(s.results))
+        s.query(10, fill=0)
+        s.query(10, fill=3)
+        self.assertEqual(s.calls, 4)
+        self.assertTrue(s.results.used <= s.results.budget)
+        # 1 was the least recently used
+        s.query(10, fill=1)
+        s.query(10, fill=0)
+        self.assertEqual(s.calls, 5)
+
+    def test_over_budget(self):
+        s = Source(budget=footprint([0] * 10))
+        s.query(100)
+        self.assertEqual(len(s.results), 0)
+        self.assertEqual(s.results.used, 0)
+
+    def test_footprint(self):
+        self.assertTrue(footprint(([1, 2], {"a": (3, 4)})) > footprint([1, 2]))
+
+    def test_footprint_samples(self):
+        rows = [ [ "row %d" % i, i ] for i in range(10000) ]
+        exact = sys.getsizeof(rows) + sum(footprint(row) for row in rows)
+        self.assertTrue(abs(footprint(rows) - exact) < exact * 0.05)
+        labels = dict(("author %d" % i, "label %d" % i) for i in range(10000))
+        self.assertTrue(footprint(labels) > footprint(labels.keys()) * 1.5)
+
+    def test_footprint_limit(self):
+        rows = [ [ i ] * 10 for i in range(10000) ]
+        self.assertTrue(1000 < footprint(rows, 1000) < footprint(rows))
+
+    def test_footprint_arrays(self):
+        a = np.zeros(1000, dtype=np.int64)
+        self.assertTrue(footprint(a) >= 8000)
+        self.assertTrue(footprint(a[10:]) >= 7920)
+        self.assertTrue(footprint((a, a[10:])) >= 15920)
+
+if __name__ == '__main__':
+    unittest.main()
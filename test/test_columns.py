@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from comp62521.database.columns import PublicationColumns
+
+class TestColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = PublicationColumns()
+        self.columns.append(0, "T1", 2001, [0, 1], "k1")
+        self.columns.append(1, None, 2003, [2], None)
+        self.columns.append(3, "T3", 2002, [1, 2, 0], "k3")
+
+    def test_append(self):
+        c = self.columns
+        self.assertEqual(len(c), 3)
+        self.assertEqual(c.pub_type.tolist(), [0, 1, 3])
+        self.assertEqual(c.year.tolist(), [2001, 2003, 2002])
+        self.assertEqual(c.offsets.tolist(), [0, 2, 3, 6])
+        self.assertEqual(c.author_ids.tolist(), [0, 1, 2, 1, 2, 0])
+        self.assertEqual(c.author_counts().tolist(), [2, 1, 3])
+        self.assertEqual(c.authorship_pubs().tolist(), [0, 0, 1, 2, 2, 2])
+
+    def test_authorship_pairs(self):
+        c = self.columns
+        pairs = [ zip(left.tolist(), right.tolist()) for left, right in c.authorship_pairs(max_pairs=4) ]
+        self.assertEqual(len(pairs), 3)
+        self.assertEqual(sum(pairs, []), [ (0, 0), (0, 1), (1, 0), (1, 1), (2, 2),
+            (3, 3), (3, 4), (3, 5), (4, 3), (4, 4), (4, 5), (5, 3), (5, 4), (5, 5) ])
+
+    def test_rows(self):
+        c = self.columns
+        self.assertEqual(c.row(1), (1, None, 2003, [2], None))
+        self.assertEqual(list(c.rows()), [ c.row(i) for i in range(3) ])
+
+    def test_append_grows(self):
+        c = PublicationColumns()
+        for i in range(3 * PublicationColumns.INITIAL_SIZE):
+            c.append(i % 4, None, 2000 + i % 7, [i, i + 1], None)
+        self.assertEqual(len(c), 3 * PublicationColumns.INITIAL_SIZE)
+        self.assertEqual(c.row(2500), (0, None, 2001, [2500, 2501], None))
+        self.assertEqual(c.offsets[-1], 6 * PublicationColumns.INITIAL_SIZE)
+
+    def test_extend(self):
+        c = self.columns
+        n = PublicationColumns.INITIAL_SIZE
+        c.extend(np.ones(n, dtype=np.int8), np.full(n, 2004), np.full(n, 2),
+            np.arange(2 * n), [ "t" ] * n, [ None ] * n)
+        self.assertEqual(len(c), n + 3)
+        self.assertEqual(c.row(2), (3, "T3", 2002, [1, 2, 0], "k3"))
+        self.assertEqual(c.row(n + 2), (1, "t", 2004, [2 * n - 2, 2 * n - 1], None))
+        self.assertEqual(c.offsets[-1], 2 * n + 6)
+        self.assertEqual(len(c.titles), n + 3)
+
+    def test_from_read_only_arrays(self):
+        arrays = [ np.array([0, 1], dtype=np.int8), np.array([2000, 2001], dtype=np.int32),
+            np.array([0, 1, 3], dtype=np.int64), np.array([0, 0, 1], dtype=np.int32) ]
+        for a in arrays:
+            a.flags.writeable = False
+        c = PublicationColumns.from_arrays(*(arrays + [["A", "B"], [None, None]]))
+        self.assertEqual(c.row(1), (1, "B", 2001, [0, 1], None))
+        c.append(2, "C", 2002, [1], None)
+        self.assertEqual(c.row(2), (2, "C", 2002, [1], None))
+        self.assertEqual(arrays[1].tolist(), [2000, 2001])
+
+if __name__ == '__main__':
+    unittest.main()
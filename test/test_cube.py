@@ -0,0 +1,48 @@
+import unittest
+
+from comp62521.database.columns import PublicationColumns
+from comp62521.database.cube import AggregateCube
+
+class TestCube(unittest.TestCase):
+
+    def setUp(self):
+        c = PublicationColumns()
+        c.append(0, None, 2000, [0, 1], None)
+        c.append(1, None, 2000, [1], None)
+        c.append(0, None, 2003, [2, 0, 2], None)
+        c.append(0, None, 2003, [0], None)
+        self.cube = AggregateCube.build(c, 3)
+
+    def test_pubs(self):
+        cube = self.cube
+        self.assertEqual(cube.first_year, 2000)
+        self.assertEqual(cube.years().tolist(), [2000, 2001, 2002, 2003])
+        self.assertEqual(cube.present().tolist(), [True, False, False, True])
+        self.assertEqual(cube.pubs.tolist(), [[1, 1, 0, 0], [0] * 4, [0] * 4, [2, 0, 0, 0]])
+
+    def test_cells(self):
+        cube = self.cube
+        self.assertEqual(zip(cube.year.tolist(), cube.pub_type.tolist(),
+            cube.author.tolist(), cube.count.tolist()),
+            [(0, 0, 0, 1), (0, 0, 1, 1), (0, 1, 1, 1), (3, 0, 0, 2), (3, 0, 2, 2)])
+
+    def test_authorships(self):
+        self.assertEqual(self.cube.authorships().tolist(),
+            [[3, 0, 0, 0], [1, 1, 0, 0], [2, 0, 0, 0]])
+
+    def test_distinct_authors(self):
+        by_cell, by_year, by_type, total = self.cube.distinct_authors()
+        self.assertEqual(by_cell.tolist(), [[2, 1, 0, 0], [0] * 4, [0] * 4, [2, 0, 0, 0]])
+        self.assertEqual(by_year.tolist(), [2, 0, 0, 2])
+        self.assertEqual(by_type, [3, 1, 0, 0])
+        self.assertEqual(total, 3)
+
+    def test_empty(self):
+        cube = AggregateCube.build(PublicationColumns(), 0)
+        self.assertEqual(cube.pubs.shape, (0, 4))
+        self.assertEqual(cube.authorships().shape, (0, 4))
+        self.assertEqual(len(cube.years()), 0)
+        self.assertEqual(cube.distinct_authors()[2:], ([0, 0, 0, 0], 0))
+
+if __name__ == '__main__':
+    unittest.main()
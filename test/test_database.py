@@ -1,4 +1,5 @@
 from os import path
+import threading
 import unittest
 
 from comp62521.database import database
@@ -29,6 +30,103 @@ class TestDatabase(unittest.TestCase):
         # publications with missing titles should be added
         self.assertEqual(len(db.publications), 1)
 
+    def test_read_sax_engine(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "simple.xml"), engine="sax"))
+        self.assertEqual(len(db.publications), 1)
+        self.assertFalse(db.read(path.join(self.data_dir, "invalid_xml_file.xml"), engine="sax"))
+
+    def test_read_dtd_entities(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "simple2.xml")))
+        self.assertEqual([a.name for a in db.authors], [u"AUTHOR1 \xe9", u"AUTHOR2 \xe9"])
+
+    def test_read_engines_match(self):
+        sax = database.Database()
+        self.assertTrue(sax.read(path.join(self.data_dir, "dblp_curated_sample.xml"), engine="sax"))
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_curated_sample.xml")))
+        self.assertEqual([ (p.pub_type, p.title, p.year, p.authors) for p in db.publications ],
+            [ (p.pub_type, p.title, p.year, p.authors) for p in sax.publications ])
+        self.assertEqual(db.author_idx, sax.author_idx)
+        self.assertEqual((db.min_year, db.max_year), (sax.min_year, sax.max_year))
+
+    def test_split_shards(self):
+        filename = path.join(self.data_dir, "dblp_curated_sample.xml")
+        prolog, footer, shards = database.split_shards(filename, 4)
+        self.assertEqual(prolog, "<dblp>")
+        self.assertEqual(footer.strip(), "</dblp>")
+        self.assertEqual(len(shards), 4)
+        data = open(filename, "rb").read()
+        self.assertEqual(shards[0][0], len(prolog))
+        for start, end in shards[1:]:
+            self.assertTrue(database.RECORD_START.match(data, start))
+        for i in range(len(shards) - 1):
+            self.assertEqual(shards[i][1], shards[i + 1][0])
+
+    def test_read_parallel(self):
+        serial = database.Database()
+        self.assertTrue(serial.read(path.join(self.data_dir, "dblp_curated_sample.xml")))
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_curated_sample.xml"), processes=2))
+        self.assertEqual([ (p.pub_type, p.title, p.year, p.authors) for p in db.publications ],
+            [ (p.pub_type, p.title, p.year, p.authors) for p in serial.publications ])
+        self.assertEqual(db.author_idx, serial.author_idx)
+        self.assertEqual(db.key_idx, serial.key_idx)
+        self.assertEqual((db.min_year, db.max_year), (serial.min_year, serial.max_year))
+
+    def test_publications_view(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "three-authors-and-three-publications.xml")))
+        self.assertEqual(len(db.publications), 3)
+        p = db.publications[-1]
+        self.assertEqual((p.pub_type, p.year), (db.columns.pub_type[2], db.columns.year[2]))
+        self.assertEqual(p.authors, db.columns.author_ids[db.columns.offsets[2]:].tolist())
+        self.assertEqual([ q.authors for q in db.publications[1:] ],
+            [ q.authors for q in list(db.publications)[1:] ])
+        self.assertRaises(IndexError, lambda: db.publications[3])
+
+    def test_author_publications(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_curated_sample.xml")))
+        postings = db.author_publications()
+        self.assertEqual(len(postings), len(db.authors))
+        expected = [ [] for _ in db.authors ]
+        for i, p in enumerate(db.publications):
+            for a in sorted(set(p.authors)):
+                expected[a].append(i)
+        self.assertEqual([ postings.of(a).tolist() for a in range(len(db.authors)) ], expected)
+
+    def test_read_keeps_keys(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_2000_2005_114_papers.xml")))
+        self.assertEqual(db.publications[0].key, "books/mit/papazoglouST2000/CasatiCPP00")
+        self.assertEqual(db.key_idx["books/mit/papazoglouST2000/CasatiCPP00"], 0)
+        self.assertEqual(len(db.key_idx), 114)
+
+    def test_read_append(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_2000_2005_114_papers.xml")))
+        self.assertEqual((db.min_year, db.max_year), (2000, 2005))
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_2006_2010_205_papers.xml"), append=True))
+        self.assertEqual(len(db.publications), 319)
+        self.assertEqual((db.min_year, db.max_year), (2000, 2010))
+        for name, a_id in db.author_idx.items():
+            self.assertEqual(db.authors[a_id].name, name)
+
+    def test_read_append_skips_known_keys(self):
+        full = database.Database()
+        self.assertTrue(full.read(path.join(self.data_dir, "dblp_curated_sample.xml")))
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_2000_2005_114_papers.xml")))
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_curated_sample.xml"), append=True))
+        self.assertEqual(len(db.publications), len(full.publications))
+        self.assertEqual(sorted(db.key_idx), sorted(full.key_idx))
+        self.assertEqual(len(db.authors), len(full.authors))
+        self.assertEqual((db.min_year, db.max_year), (full.min_year, full.max_year))
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_curated_sample.xml"), append=True, processes=2))
+        self.assertEqual(len(db.publications), len(full.publications))
+
     def test_get_average_authors_per_publication(self):
         db = database.Database()
         self.assertTrue(db.read(path.join(self.data_dir, "sprint-2-acceptance-1.xml")))
@@ -746,6 +844,22 @@ class TestDatabase(unittest.TestCase):
         data = db.get_authors_pages_coauthors("Bernard Horan")
         self.assertEqual(data, 3, "incorrect co-authors")
 
+    def test_get_author_profile(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "publications_small_sample.xml")))
+        data = db.get_author_profile("Bernard Horan")
+        self.assertEqual(data["publications"], db.get_authors_pages_publications("Bernard Horan"))
+        self.assertEqual(data["coauthors"], 3)
+
+    def test_get_author_profile_after_add_publication(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "simple.xml")))
+        self.assertEqual(db.get_author_profile("AUTHOR1")["sole"][0], 0)
+        db.add_publication(database.Publication.JOURNAL, "T", 2001, ["AUTHOR1"])
+        data = db.get_author_profile("AUTHOR1")
+        self.assertEqual(data["publications"], [2, 1, 1, 0, 0])
+        self.assertEqual(data["sole"], [1, 1, 0, 0, 0])
+
     def test_degrees_of_separation_sp1(self):
         t = 0
         R = []
@@ -779,6 +893,29 @@ class TestDatabase(unittest.TestCase):
             "header and data column size doesn't match")
         self.assertEqual(data, [('Rodrigo Lopez', 'Norman W. Paton', 'X')], "incorrect degrees")
 
+    def test_degrees_of_separation_chain(self):
+        db = database.Database()
+        for i in range(4):
+            db.add_publication(database.Publication.JOURNAL, "T", 2000,
+                [ "AUTHOR%d" % i, "AUTHOR%d" % (i + 1) ])
+        db.add_publication(database.Publication.JOURNAL, "T", 2000, ["AUTHOR9"])
+        header, data = db.degrees_of_separation("AUTHOR0", "AUTHOR4")
+        self.assertEqual(data, [("AUTHOR0", "AUTHOR4", 3)])
+        header, data = db.degrees_of_separation("AUTHOR0", "AUTHOR9")
+        self.assertEqual(data, [("AUTHOR0", "AUTHOR9", "X")])
+        header, data = db.degrees_of_separation("AUTHOR0", "AUTHOR0")
+        self.assertEqual(data, [("AUTHOR0", "AUTHOR0", "X")])
+
+    def test_degrees_of_separation_batch(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "publications_small_sample.xml")))
+        pairs = [ (a.name, b.name) for a in db.authors for b in db.authors ]
+        self.assertEqual(list(db.degrees_of_separation_batch(pairs)),
+            [ db.degrees_of_separation(a, b)[1][0] for a, b in pairs ])
+        rows = list(db.degrees_of_separation_from("Sean Bechhofer"))
+        self.assertEqual(len(rows), len(db.authors) - 1)
+        self.assertTrue(("Sean Bechhofer", "Simon Harper", 1) in rows)
+
     def test_get_coauthor_data_sp3_1(self):
         db = database.Database()
         self.assertTrue(db.read(path.join(self.data_dir, "dblp_2000_2005_114_papers.xml")))
@@ -786,5 +923,116 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(data[0][0], u'Z. Meral zsoyoglu (6)', "incorrect author")
         self.assertEqual(data[0][1], u'Stefano Ceri (79), Richard T. Snodgrass (34), Leonid A. Kalinichenko (6), Masaru Kitsuregawa (6), Hongjun Lu (6), Victor Vianu (6)', "incorrect coauthors")
 
+    def test_concurrent_queries(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_curated_sample.xml")))
+        expected = database.Database()
+        expected.read(path.join(self.data_dir, "dblp_curated_sample.xml"))
+        queries = [ ("get_stats_for_author", (name, key_name, 1))
+                for name in [ "", "a", "e" ] for key_name in [ "", "coauthor", "last" ] ] + [
+            ("get_publications_by_author", ("total", 1)),
+            ("get_coauthor_data", (None, None, 4, "author", 0)),
+            ("get_average_authors_per_publication_by_author", (database.Stat.MODE,)) ]
+        results = {}
+        def run(query):
+            name, args = query
+            results[query] = getattr(db, name)(*args)
+        threads = [ threading.Thread(target=run, args=(query,)) for query in queries ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for name, args in queries:
+            self.assertEqual(results[(name, args)], getattr(expected, name)(*args))
+        # the authors themselves are left alone
+        self.assertEqual(set(tuple(sorted(vars(a))) for a in db.authors), set([("name", "sort_key")]))
+
+    def test_result_cache(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "simple.xml")))
+        header, data = db.get_publications_by_author()
+        self.assertTrue(db.get_publications_by_author() is db.get_publications_by_author())
+        self.assertEqual(db.get_publications_by_author(), (header, data))
+        db.add_publication(database.Publication.BOOK, "T", 2001, [ "New Author" ])
+        self.assertEqual(len(db.get_publications_by_author()[1]), len(data) + 1)
+        self.assertTrue(db.read(path.join(self.data_dir, "simple.xml")))
+        self.assertEqual(db.get_publications_by_author(), (header, data))
+
+    def test_collation(self):
+        self.assertEqual(database.collation_key("Jan van Dijk"), ("Dijk", "Jan van"))
+        self.assertEqual(database.Author("Plato").sort_key, ("Plato", ""))
+        db = database.Database()
+        db.add_publication(database.Publication.JOURNAL, "T", 2000,
+            [ "Ann Young", "Bob Adams", "Ann Adams" ])
+        self.assertEqual(db.collation_rank().tolist(), [2, 1, 0])
+        header, data = db.get_publications_by_author("author", 0)
+        self.assertEqual([ row[0] for row in data ], ["Ann Adams", "Bob Adams", "Ann Young"])
+        db.add_publication(database.Publication.BOOK, "T", 2001, [ "Bob Adams", "Aaron Zed" ])
+        self.assertEqual(db.collation_rank().tolist(), [2, 1, 0, 3])
+        header, data = db.get_publications_by_author("total", 1)
+        self.assertEqual([ row[0] for row in data ],
+            ["Bob Adams", "Aaron Zed", "Ann Young", "Ann Adams"])
+
+    def test_sorted_author_tables_limit(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_curated_sample.xml")))
+        for key_name in [ "", "author", "total", "journals" ]:
+            for descending in [ 0, 1 ]:
+                # picked without a cached order, then sliced from it
+                top = db.get_publications_by_author(key_name, descending, 5)
+                header, data = db.get_publications_by_author(key_name, descending)
+                self.assertEqual(top, (header, data[:5]))
+                self.assertEqual(db.get_publications_by_author(key_name, descending, 5), top)
+        header, data = db.get_stats_for_author("", "coauthor", 1)
+        self.assertEqual(db.get_stats_for_author("", "coauthor", 1, 3), (header, data[:3]))
+        header, data = db.get_stats_for_author("an", "first", 0)
+        self.assertEqual(db.get_stats_for_author("an", "first", 0, 2), (header, data[:2]))
+        self.assertEqual(db.get_publications_by_author("total", 1, 0)[1], [])
+
+    def test_sorted_author_tables_cache(self):
+        db = database.Database()
+        db.add_publication(database.Publication.JOURNAL, "T", 2000, [ "Ann Young", "Bob Adams" ])
+        db.add_publication(database.Publication.JOURNAL, "T", 2000, [ "Bob Adams" ])
+        header, data = db.get_publications_by_author("total", 1, 1)
+        self.assertEqual(data[0][0], "Bob Adams")
+        db.get_publications_by_author("total", 1)
+        db.add_publication(database.Publication.BOOK, "T", 2001, [ "Ann Young" ])
+        db.add_publication(database.Publication.BOOK, "T", 2001, [ "Ann Young" ])
+        header, data = db.get_publications_by_author("total", 1, 1)
+        self.assertEqual(data[0][0], "Ann Young")
+
+    def test_get_coauthor_page(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_2000_2005_114_papers.xml")))
+        for key_name in [ "", "author" ]:
+            for descending in [ 0, 1 ]:
+                header, data = db.get_coauthor_data(2000, 2005, 4, key_name, descending)
+                page = db.get_coauthor_page(2000, 2005, 4, key_name, descending, 2, 7)
+                self.assertEqual((page[0], page[2]), (header, len(data)))
+                self.assertEqual([ row[0] for row in page[1] ], [ row[0] for row in data[7:14] ])
+                self.assertEqual([ row[1] for row in page[1] ],
+                    [ len(row[1].split(", ")) for row in data[7:14] ])
+        header, data, total = db.get_coauthor_page(2000, 2005, 4, "author", 1, 1, 1)
+        self.assertEqual(data[0][0], u'Z. Meral zsoyoglu (6)')
+        self.assertEqual(len(db.get_coauthors_in(data[0][2], 2000, 2005, 4)), data[0][1])
+        labels = dict((row[0], row[1].split(", ")) for row in db.get_coauthor_data(2002, 2004, 0)[1])
+        for label, count, name in db.get_coauthor_page(2002, 2004, 0, "", 0, 1, total)[1]:
+            self.assertEqual(sorted(db.get_coauthors_in(name, 2002, 2004, 0)), sorted(labels[label]))
+        counts = [ row[1] for row in db.get_coauthor_page(2000, 2005, 4, "coauthors", 1, 1, total)[1] ]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual(db.get_coauthor_page(2000, 2005, 4, "", 0, 1000, 10)[1], [])
+
+    def test_coauthor_pages_share_rows(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_2000_2005_114_papers.xml")))
+        walks = []
+        pairs = db._coauthor_pairs
+        db._coauthor_pairs = lambda *args: walks.append(args) or pairs(*args)
+        pages = [ db.get_coauthor_page(2000, 2005, 4, "coauthors", 1, page, 5)[1]
+            for page in [1, 2, 3] ]
+        name = pages[1][0][2]
+        self.assertEqual(len(db.get_coauthors_in(name, 2000, 2005, 4)), pages[1][0][1])
+        self.assertEqual(len(walks), 1)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+
+from comp62521.database.columns import PublicationColumns
+from comp62521.database.graph import CoauthorEdges, CoauthorGraph, first_seen
+from comp62521.database.yearindex import YearIndex
+
+class TestGraph(unittest.TestCase):
+
+    def setUp(self):
+        c = PublicationColumns()
+        c.append(0, None, 2000, [0, 1, 2], None)
+        c.append(1, None, 2001, [1, 0], None)
+        c.append(1, None, 2002, [0], None)
+        c.append(3, None, 2002, [3, 1, 3], None)
+        c.append(3, None, 2003, [4], None)
+        self.graph = CoauthorGraph.build(c, 5)
+
+    def test_build(self):
+        g = self.graph
+        self.assertEqual(len(g), 5)
+        self.assertEqual(g.indptr.tolist(), [0, 2, 5, 7, 8, 8])
+        self.assertEqual(g.indices.tolist(), [1, 2, 0, 2, 3, 0, 1, 1])
+        self.assertEqual(g.weights.tolist(), [2, 1, 2, 1, 2, 1, 1, 1])
+        self.assertEqual(g.own.tolist(), [3, 3, 1, 2, 1])
+        self.assertEqual(g.degree().tolist(), [2, 3, 2, 1, 0])
+        self.assertEqual(g.neighbours(1).tolist(), [0, 2, 3])
+
+    def test_collaborations(self):
+        g = self.graph
+        self.assertEqual(g.collaborations(1, True), {0:2, 1:3, 2:1, 3:2})
+        self.assertEqual(g.collaborations(3, False), {1:1})
+        self.assertEqual(g.collaborations(4, True), {4:1})
+
+    def test_edges(self):
+        left, right = self.graph.edges()
+        self.assertEqual(zip(left.tolist(), right.tolist()), [(0, 1), (0, 2), (1, 2), (1, 3)])
+
+    def test_neighbours_of(self):
+        self.assertEqual(self.graph.neighbours_of([3, 0, 4]).tolist(), [1, 1, 2])
+
+    def test_distance(self):
+        g = self.graph
+        self.assertEqual(g.distance(0, 0), 0)
+        self.assertEqual(g.distance(0, 1), 1)
+        self.assertEqual(g.distance(0, 3), 2)
+        self.assertEqual(g.distance(3, 2), 2)
+        self.assertEqual(g.distance(0, 4), -1)
+
+    def test_distances_from(self):
+        g = self.graph
+        self.assertEqual(g.distances_from(0).tolist(), [0, 1, 1, 2, -1])
+        self.assertEqual(g.distances_from(4).tolist(), [-1, -1, -1, -1, 0])
+
+    def test_distance_long_chain(self):
+        c = PublicationColumns()
+        for i in range(5000):
+            c.append(0, None, 2000, [i, i + 1], None)
+        g = CoauthorGraph.build(c, 5001)
+        self.assertEqual(g.distance(0, 5000), 5000)
+        self.assertEqual(g.distance(4000, 17), 3983)
+        self.assertEqual(g.distances_from(17)[4000], 3983)
+
+    def test_empty(self):
+        g = CoauthorGraph.build(PublicationColumns(), 0)
+        self.assertEqual(len(g), 0)
+        self.assertEqual(g.indptr.tolist(), [0])
+
+class TestEdges(unittest.TestCase):
+
+    def setUp(self):
+        c = PublicationColumns()
+        c.append(0, None, 2000, [2, 0], None)
+        c.append(1, None, 2000, [1, 0, 1], None)
+        c.append(0, None, 2001, [0, 2, 1], None)
+        c.append(0, None, 2000, [1, 2], None)
+        self.years = YearIndex.build(c)
+        self.edges = CoauthorEdges.build(c, 3, self.years)
+
+    def test_build(self):
+        e = self.edges
+        self.assertEqual(e.offsets.tolist(), [0, 4, 6, 6, 6, 12, 12, 12, 12])
+        self.assertEqual(zip(e.left.tolist(), e.right.tolist())[:6],
+            [(0, 2), (1, 2), (2, 0), (2, 1), (0, 1), (1, 0)])
+
+    def test_select(self):
+        e = self.edges
+        left, right = e.select(self.years.buckets(2000, 2000, 0))
+        self.assertEqual(zip(left.tolist(), right.tolist()), [(2, 0), (0, 2), (1, 2), (2, 1)])
+        left, right = e.select(self.years.buckets())
+        self.assertEqual(zip(left.tolist(), right.tolist()),
+            [(2, 0), (0, 2), (1, 0), (0, 1), (2, 1), (1, 2)])
+        left, right = e.select(self.years.buckets(2002, None))
+        self.assertEqual(len(left), 0)
+
+    def test_first_seen(self):
+        keys, ranks = first_seen(np.array([5, 3, 5, 3, 1]), np.array([0, 4, 2, 1, 3]))
+        self.assertEqual(keys.tolist(), [1, 3, 5])
+        self.assertEqual(ranks.tolist(), [3, 1, 0])
+        keys, ranks = first_seen(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self.assertEqual(len(keys), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+from comp62521.statistics import average, grouped
+
+class TestGrouped(unittest.TestCase):
+
+    def setUp(self):
+        self.groups = np.array([2, 0, 2, 0, 2, 0, 3, 3])
+        self.values = np.array([5, 1, 5, 2, 9, 2, 9, 1])
+
+    def test_split(self):
+        values, bounds = grouped.split(self.groups, self.values, 4)
+        self.assertEqual(values.tolist(), [1, 2, 2, 5, 5, 9, 9, 1])
+        self.assertEqual(bounds.tolist(), [0, 3, 3, 6, 8])
+
+    def test_mean(self):
+        self.assertEqual(grouped.mean(self.groups, self.values, 4),
+            [5.0 / 3, 0, 19.0 / 3, 5.0])
+
+    def test_median(self):
+        self.assertEqual(grouped.median(self.groups, self.values, 4), [2, 0, 5, 5.0])
+
+    def test_mode(self):
+        self.assertEqual(grouped.mode(self.groups, self.values, 4), [[2], [], [5], [9, 1]])
+
+    def test_mode_keeps_dict_order_for_ties(self):
+        self.assertEqual(grouped.mode([0, 0, 0, 0, 1, 1], [1, 8, 1, 8, 3, 2], 2),
+            [[8, 1], [2, 3]])
+
+    def test_empty(self):
+        values = np.zeros(0, dtype=np.int64)
+        self.assertEqual(grouped.mean(values, values, 2), [0, 0])
+        self.assertEqual(grouped.median(values, values, 2), [0, 0])
+        self.assertEqual(grouped.mode(values, values, 2), [[], []])
+
+    def test_matches_average(self):
+        rng = np.random.RandomState(0)
+        groups = rng.randint(0, 50, 2000)
+        for values in [ rng.randint(0, 6, 2000), rng.randint(-3, 40, 2000), rng.rand(2000) ]:
+            for name in ["mean", "median", "mode"]:
+                expected = [ getattr(average, name)(values[groups == g].tolist()) for g in range(52) ]
+                self.assertEqual(getattr(grouped, name)(groups, values, 52), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+from os import path
+import json
+import unittest
+import weakref
+import comp62521
+from comp62521 import views
+from comp62521.database import database
+from comp62521.loader import Loader
+from comp62521.warmup import Warmup
+
+class TestLoader(unittest.TestCase):
+
+    def setUp(self):
+        dir, _ = path.split(__file__)
+        self.data_dir = path.join(dir, "..", "data")
+        comp62521.app.config['TESTING'] = True
+        comp62521.app.config['DATASET'] = "dblp_curated_sample.xml"
+        self.app = comp62521.app.test_client()
+
+    def tearDown(self):
+        for name in [ 'LOADER', 'RELOADER', 'WARMUP', 'DATA_FILE', 'RELOAD_TOKEN' ]:
+            comp62521.app.config.pop(name, None)
+
+    def test_load(self):
+        seen = []
+        loader = Loader(path.join(self.data_dir, "dblp_curated_sample.xml"), seen.append)
+        self.assertEqual(loader.status()["state"], "loading")
+        loader.start()
+        loader.join()
+        self.assertTrue(loader.done.is_set())
+        self.assertEqual(len(seen), 1)
+        self.assertTrue(loader.db is None)
+        status = loader.status()
+        self.assertEqual(status["state"], "ready")
+        self.assertEqual(status["publications"], len(seen[0].publications))
+        self.assertTrue(status["publications"] > 0)
+
+    def test_failed(self):
+        loader = Loader(path.join(self.data_dir, "invalid_xml_file.xml"))
+        loader.run()
+        self.assertEqual(loader.state, "failed")
+        self.assertTrue(loader.status()["error"])
+
+    def test_pages_while_loading(self):
+        loader = Loader(path.join(self.data_dir, "dblp_curated_sample.xml"),
+            lambda db: comp62521.app.config.update(DATABASE=db))
+        comp62521.app.config['LOADER'] = loader
+        r = self.app.get("/averages")
+        self.assertEqual(503, r.status_code)
+        self.assertTrue("Loading the dataset" in r.data)
+        self.assertEqual(json.loads(self.app.get("/status").data)["state"], "loading")
+        self.assertEqual(503, self.app.get("/ready").status_code)
+        self.assertEqual(200, self.app.get("/").status_code)
+
+        loader.run()
+        self.assertEqual(200, self.app.get("/averages").status_code)
+        self.assertEqual(200, self.app.get("/ready").status_code)
+        self.assertEqual(json.loads(self.app.get("/status").data)["state"], "ready")
+
+    def test_reload(self):
+        data_file = path.join(self.data_dir, "dblp_curated_sample.xml")
+        old = database.Database()
+        comp62521.app.config['DATABASE'] = old
+        self.assertEqual(400, self.app.post("/reload").status_code)
+
+        comp62521.app.config['DATA_FILE'] = data_file
+        self.assertEqual(len(old.publications), 0)
+        old = weakref.ref(old)
+        self.assertReloadFrees(old)
+        self.assertEqual(json.loads(self.app.get("/status").data)["reload"]["state"], "ready")
+
+        # a reload that is still running is not started again
+        comp62521.app.config['RELOADER'] = Loader(data_file)
+        self.assertEqual(409, self.app.post("/reload").status_code)
+
+    def test_reload_access(self):
+        comp62521.app.config['DATA_FILE'] = path.join(self.data_dir, "dblp_curated_sample.xml")
+        remote = {"REMOTE_ADDR":"192.0.2.1"}
+        self.assertEqual(403, self.app.post("/reload", environ_base=remote).status_code)
+
+        comp62521.app.config['RELOAD_TOKEN'] = "secret"
+        self.assertEqual(403, self.app.post("/reload").status_code)
+        self.assertEqual(403, self.app.post("/reload", environ_base=remote,
+            headers={"X-Reload-Token":"wrong"}).status_code)
+        self.assertEqual(202, self.app.post("/reload", environ_base=remote,
+            headers={"X-Reload-Token":"secret"}).status_code)
+        comp62521.app.config['RELOADER'].join()
+
+    def assertReloadFrees(self, old):
+        """Reload, and check that nothing holds on to the old database."""
+        self.assertEqual(202, self.app.post("/reload").status_code)
+        comp62521.app.config['RELOADER'].join()
+        db = comp62521.app.config['DATABASE']
+        self.assertFalse(db is old())
+        self.assertTrue(len(db.publications) > 0)
+        self.assertTrue(old() is None)
+
+    def test_reload_frees_lazy_load(self):
+        data_file = path.join(self.data_dir, "dblp_curated_sample.xml")
+        comp62521.app.config['DATA_FILE'] = data_file
+        loader = Loader(data_file, lambda db: comp62521.app.config.update(DATABASE=db))
+        comp62521.app.config['LOADER'] = loader
+        loader.start()
+        loader.join()
+        self.assertReloadFrees(weakref.ref(comp62521.app.config['DATABASE']))
+
+    def test_reload_frees_warmed_up(self):
+        data_file = path.join(self.data_dir, "dblp_curated_sample.xml")
+        comp62521.app.config['DATA_FILE'] = data_file
+        db = database.Database()
+        db.read(data_file)
+        comp62521.app.config['DATABASE'] = db
+        warmup = Warmup(db, views.default_queries(db))
+        comp62521.app.config['WARMUP'] = warmup
+        warmup.start()
+        warmup.join()
+        self.assertTrue(len(db.results) > 0)
+        old = weakref.ref(db)
+        del db
+        self.assertReloadFrees(old)
+
+    def test_reload_after_failed_load(self):
+        loader = Loader(path.join(self.data_dir, "invalid_xml_file.xml"))
+        comp62521.app.config['LOADER'] = loader
+        loader.run()
+        self.assertEqual(500, self.app.get("/averages").status_code)
+        self.assertEqual(503, self.app.get("/ready").status_code)
+
+        comp62521.app.config['DATA_FILE'] = path.join(self.data_dir, "dblp_curated_sample.xml")
+        self.assertEqual(202, self.app.post("/reload").status_code)
+        comp62521.app.config['RELOADER'].join()
+        self.assertEqual(200, self.app.get("/averages").status_code)
+        self.assertEqual(200, self.app.get("/ready").status_code)
+        self.assertEqual(json.loads(self.app.get("/status").data)["state"], "ready")
+
+if __name__ == '__main__':
+    unittest.main()
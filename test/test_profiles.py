@@ -0,0 +1,45 @@
+import unittest
+
+from comp62521.database.columns import PublicationColumns
+from comp62521.database.graph import CoauthorGraph
+from comp62521.database.profiles import AuthorProfiles
+
+class TestProfiles(unittest.TestCase):
+
+    def setUp(self):
+        c = PublicationColumns()
+        c.append(0, None, 2000, [0, 1, 2], None)
+        c.append(1, None, 2001, [1, 0], None)
+        c.append(1, None, 2002, [0], None)
+        c.append(3, None, 2002, [3, 3], None)
+        self.profiles = AuthorProfiles.build(c, CoauthorGraph.build(c, 4))
+
+    def test_counts(self):
+        p = self.profiles
+        # overall, journal articles, conference papers, books, book chapters
+        self.assertEqual(p.row(0, AuthorProfiles.ALL), [3, 2, 1, 0, 0])
+        self.assertEqual(p.row(0, AuthorProfiles.FIRST), [1, 0, 1, 0, 0])
+        self.assertEqual(p.row(0, AuthorProfiles.LAST), [1, 1, 0, 0, 0])
+        self.assertEqual(p.row(0, AuthorProfiles.SOLE), [1, 1, 0, 0, 0])
+        self.assertEqual(p.row(2, AuthorProfiles.LAST), [1, 0, 1, 0, 0])
+        self.assertEqual(p.row(0, AuthorProfiles.LAST_ONLY), [1, 1, 0, 0, 0])
+
+    def test_author_listed_twice(self):
+        p = self.profiles
+        self.assertEqual(p.row(3, AuthorProfiles.ALL), [1, 0, 0, 0, 1])
+        self.assertEqual(p.row(3, AuthorProfiles.FIRST), [1, 0, 0, 0, 1])
+        self.assertEqual(p.row(3, AuthorProfiles.LAST), [1, 0, 0, 0, 1])
+        self.assertEqual(p.row(3, AuthorProfiles.LAST_ONLY), [0, 0, 0, 0, 0])
+        self.assertEqual(p.coauthors[3], 0)
+
+    def test_coauthors(self):
+        self.assertEqual(self.profiles.coauthors.tolist(), [2, 2, 2, 0])
+
+    def test_empty(self):
+        c = PublicationColumns()
+        p = AuthorProfiles.build(c, CoauthorGraph.build(c, 0))
+        self.assertEqual(p.counts.shape, (0, 5, 4))
+        self.assertEqual(len(p.coauthors), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+from os import path
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from comp62521.database import database, snapshot
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        dir, _ = path.split(__file__)
+        self.data_dir = path.join(dir, "..", "data")
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_pack_strings(self):
+        strings = [u"caf\xe9", None, "", "AUTHOR"]
+        offsets, data, missing, order = snapshot.pack_strings(strings)
+        self.assertEqual(offsets.tolist(), [0, 5, 5, 5, 11])
+        self.assertEqual(order.tolist(), [2, 3, 0])
+        packed = snapshot.PackedStrings(offsets, data, missing)
+        self.assertEqual(list(packed), strings)
+        self.assertEqual((packed[0], packed[-1], packed[1:3]), (u"caf\xe9", u"AUTHOR", [None, u""]))
+        packed.append(u"NEW")
+        self.assertEqual((len(packed), packed[4]), (5, u"NEW"))
+        self.assertRaises(IndexError, lambda: packed[5])
+
+    def test_string_index(self):
+        strings = [u"caf\xe9", None, u"AUTHOR", u"ZED", u"ABC"]
+        offsets, data, missing, order = snapshot.pack_strings(strings)
+        index = snapshot.StringIndex(snapshot.PackedStrings(offsets, data, missing), order)
+        self.assertEqual([ index[s] for s in strings if s is not None ], [0, 2, 3, 4])
+        self.assertEqual(index.get("AUTHO"), None)
+        self.assertFalse("AUTHORS" in index)
+        self.assertRaises(KeyError, lambda: index[u"caf"])
+        index[u"NEW"] = 5
+        self.assertEqual((index[u"NEW"], len(index)), (5, 5))
+        self.assertEqual(sorted(index.keys()), sorted([ s for s in strings if s is not None ] + [u"NEW"]))
+
+    def test_write_and_read(self):
+        filename = path.join(self.tmp_dir, "arrays.snap")
+        snapshot.write(filename, {"n":3}, {
+            "a":np.arange(3, dtype=np.int8),
+            "b":np.arange(6, dtype=np.int64).reshape(2, 3),
+            "c":np.zeros(0, dtype=np.int32) })
+        self.assertTrue(snapshot.is_snapshot(filename))
+        meta, arrays = snapshot.read(filename)
+        self.assertEqual(meta, {"n":3})
+        self.assertEqual(arrays["a"].tolist(), [0, 1, 2])
+        self.assertEqual(arrays["b"].tolist(), [[0, 1, 2], [3, 4, 5]])
+        self.assertEqual(len(arrays["c"]), 0)
+
+    def test_write_replaces(self):
+        filename = path.join(self.tmp_dir, "arrays.snap")
+        meta = {"n":1}
+        snapshot.write(filename, meta, {"a":np.arange(4, dtype=np.int64)})
+        _, old = snapshot.read(filename)
+        arrays = {"a":np.arange(8, dtype=np.int64)[::2]}
+        snapshot.write(filename, meta, arrays)
+        self.assertEqual(meta, {"n":1})
+        self.assertFalse(arrays["a"].flags.c_contiguous)
+        # a mapping of the old file is not changed by writing the new one
+        self.assertEqual(old["a"].tolist(), [0, 1, 2, 3])
+        self.assertEqual(snapshot.read(filename)[1]["a"].tolist(), [0, 2, 4, 6])
+        self.assertEqual(os.listdir(self.tmp_dir), ["arrays.snap"])
+
+    def test_save_and_load(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_curated_sample.xml")))
+        filename = path.join(self.tmp_dir, "dblp.snap")
+        db.save_snapshot(filename)
+
+        loaded = database.Database()
+        self.assertTrue(loaded.load_snapshot(filename))
+        self.assertEqual([ (p.pub_type, p.title, p.year, p.authors, p.key) for p in loaded.publications ],
+            [ (p.pub_type, p.title, p.year, p.authors, p.key) for p in db.publications ])
+        self.assertEqual([ a.name for a in loaded.authors ], [ a.name for a in db.authors ])
+        self.assertEqual(dict((n, loaded.author_idx[n]) for n in db.author_idx), db.author_idx)
+        self.assertEqual(dict((k, loaded.key_idx[k]) for k in db.key_idx), db.key_idx)
+        self.assertEqual(len(loaded.key_idx), len(db.key_idx))
+        self.assertEqual((loaded.min_year, loaded.max_year), (db.min_year, db.max_year))
+
+    def test_load_keeps_derived(self):
+        db = database.Database()
+        self.assertTrue(db.read(path.join(self.data_dir, "dblp_curated_sample.xml")))
+        db.get_publications_by_author("total", 1)
+        filename = path.join(self.tmp_dir, "dblp.snap")
+        db.save_snapshot(filename)
+
+        loaded = database.Database()
+        self.assertTrue(loaded.load_snapshot(filename))
+        self.assertEqual(sorted(loaded.derived, key=str), sorted(db.derived, key=str))
+        for name, (version, value) in db.derived.items():
+            if isinstance(value, np.ndarray):
+                self.assertEqual(loaded.derived[name][1].tolist(), value.tolist())
+            elif isinstance(value, list):
+                self.assertEqual(loaded.derived[name][1].tolist(), value)
+            else:
+                self.assertEqual(sorted(vars(loaded.derived[name][1])), sorted(vars(value)))
+                for attr, field in vars(value).items():
+                    self.assertEqual(np.asarray(getattr(loaded.derived[name][1], attr)).tolist(),
+                        np.asarray(field).tolist())
+
+        # queries read the mapped structures, and match the original
+        for key_name in [ "", "author", "total", "first" ]:
+            self.assertEqual(loaded.get_stats_for_author("", key_name, 1),
+                db.get_stats_for_author("", key_name, 1))
+            self.assertEqual(loaded.get_coauthor_data(None, None, 4, "coauthors", 0),
+                db.get_coauthor_data(None, None, 4, "coauthors", 0))
+        self.assertEqual(loaded.get_publications_by_author("total", 1),
+            db.get_publications_by_author("total", 1))
+        self.assertEqual(loaded.get_author_profile(u"Stefano Ceri"),
+            db.get_author_profile(u"Stefano Ceri"))
+
+        # appending rebuilds them
+        loaded.add_publication(database.Publication.JOURNAL, "T", 2015,
+            [ u"Stefano Ceri", u"NEW AUTHOR" ], "new/1")
+        db.add_publication(database.Publication.JOURNAL, "T", 2015,
+            [ u"Stefano Ceri", u"NEW AUTHOR" ], "new/1")
+        self.assertEqual(loaded.author_idx[u"NEW AUTHOR"], len(db.authors) - 1)
+        self.assertEqual(loaded.get_stats_for_author("", "total", 1),
+            db.get_stats_for_author("", "total", 1))
+        self.assertEqual(loaded.get_coauthor_details(u"NEW AUTHOR"),
+            db.get_coauthor_details(u"NEW AUTHOR"))
+
+    def test_load_rejects_xml(self):
+        filename = path.join(self.data_dir, "simple.xml")
+        self.assertFalse(snapshot.is_snapshot(filename))
+        db = database.Database()
+        self.assertFalse(db.load_snapshot(filename))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from comp62521.statistics import average, sparse
+
+class TestSparse(unittest.TestCase):
+
+    def test_mean(self):
+        self.assertEqual(sparse.mean([1, 3], [2, 4], 6), 1.0)
+        self.assertEqual(sparse.mean([], [], 3), 0.0)
+        self.assertEqual(sparse.mean([], [], 0), 0)
+
+    def test_median(self):
+        self.assertEqual(sparse.median([1, 3], [2, 4], 5), 0)
+        self.assertEqual(sparse.median([1, 3], [2, 4], 3), 2)
+        self.assertEqual(sparse.median([0, 1], [-1, 3], 4), 0.0)
+        self.assertEqual(sparse.median([0, 1, 2], [1, 3, 5], 4), 2.0)
+
+    def test_mode(self):
+        self.assertEqual(sparse.mode([1, 3], [2, 2], 5), [0])
+        self.assertEqual(sparse.mode([0, 1, 2], [2, 2, 1], 3), [2])
+        self.assertEqual(sparse.mode([], [], 0), [])
+
+    def test_first_zero(self):
+        self.assertEqual(sparse.first_zero([0, 1, 3]), 2)
+        self.assertEqual(sparse.first_zero([1, 2]), 0)
+        self.assertEqual(sparse.first_zero([0, 1]), 2)
+
+    def test_matches_average(self):
+        rng = np.random.RandomState(0)
+        for trial in range(200):
+            dense = rng.randint(-2, 12, rng.randint(1, 30)) * (rng.rand() < 0.5)
+            dense[rng.rand(len(dense)) < 0.6] = 0
+            index = np.flatnonzero(dense)
+            for name in ["mean", "median", "mode"]:
+                self.assertEqual(getattr(sparse, name)(index, dense[index], len(dense)),
+                    getattr(average, name)(dense))
+
+if __name__ == '__main__':
+    unittest.main()
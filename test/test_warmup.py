@@ -0,0 +1,65 @@
+from os import path
+import json
+import unittest
+import comp62521
+from comp62521 import views
+from comp62521.database import database
+from comp62521.warmup import Warmup
+
+class TestWarmup(unittest.TestCase):
+
+    def setUp(self):
+        dir, _ = path.split(__file__)
+        self.db = database.Database()
+        self.db.read(path.join(dir, "..", "data", "dblp_curated_sample.xml"))
+        comp62521.app.config['TESTING'] = True
+        comp62521.app.config['DATASET'] = "dblp_curated_sample.xml"
+        comp62521.app.config['DATABASE'] = self.db
+        self.app = comp62521.app.test_client()
+
+    def tearDown(self):
+        comp62521.app.config.pop('WARMUP', None)
+
+    def test_warmup(self):
+        queries = views.default_queries(self.db)
+        warmup = Warmup(self.db, queries)
+        comp62521.app.config['WARMUP'] = warmup
+        self.assertEqual(503, self.app.get("/ready").status_code)
+        warmup.start()
+        warmup.join()
+        self.assertTrue(warmup.ready.is_set())
+        self.assertEqual(200, self.app.get("/ready").status_code)
+        self.assertEqual(warmup.uncached, [])
+        warmed = len(self.db.results)
+
+        # the default pages are answered from what was warmed up
+        for url in [ "/averages", "/coauthors", "/stats" ] + [ "/statisticsdetails/" + s
+                for s in [ "publication_summary", "publication_author", "publication_year", "author_year" ] ]:
+            self.assertEqual(200, self.app.get(url).status_code)
+        self.assertEqual(len(self.db.results), warmed)
+
+    def test_uncached(self):
+        db = database.Database(cache_budget=64 << 10)
+        db.read(path.join(path.dirname(__file__), "..", "data", "dblp_curated_sample.xml"))
+        queries = views.default_queries(db)
+        warmup = Warmup(db, queries)
+        comp62521.app.config['WARMUP'] = warmup
+        warmup.run()
+        names = [ name for name, _ in warmup.uncached ]
+        self.assertTrue("get_coauthor_data" in names)
+        self.assertFalse("build_indexes" in names)
+        self.assertFalse("_coauthor_order" in names)
+        response = self.app.get("/ready")
+        self.assertEqual(503, response.status_code)
+        self.assertTrue("get_coauthor_data" in json.loads(response.data)["uncached"])
+
+    def test_failure(self):
+        warmup = Warmup(self.db, [ ("get_author_profile", ("Nobody",)) ])
+        warmup.run()
+        self.assertTrue(warmup.ready.is_set())
+
+    def test_no_warmup(self):
+        self.assertEqual(200, self.app.get("/ready").status_code)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from comp62521.database.columns import PublicationColumns
+from comp62521.database.yearindex import YearIndex
+
+class TestYearIndex(unittest.TestCase):
+
+    def setUp(self):
+        c = PublicationColumns()
+        for pub_type, year in [ (0, 2003), (1, 2001), (0, 2001), (1, 2003), (0, 2001), (3, 2004) ]:
+            c.append(pub_type, None, year, [0], None)
+        self.index = YearIndex.build(c)
+
+    def test_build(self):
+        index = self.index
+        self.assertEqual(index.first_year, 2001)
+        self.assertEqual(index.years, 4)
+        self.assertEqual(len(index), 16)
+        self.assertEqual(index.bucket_of([2001, 2003, 2004], [1, 0, 3]).tolist(), [1, 8, 15])
+
+    def test_buckets(self):
+        index = self.index
+        self.assertEqual(index.buckets().tolist(), range(16))
+        self.assertEqual(index.buckets(2002, None).tolist(), range(4, 16))
+        self.assertEqual(index.buckets(None, 2003, 0).tolist(), [0, 4, 8])
+        self.assertEqual(index.buckets(2001, 2001, 1).tolist(), [1])
+        self.assertEqual(index.buckets(1990, 2010, 3).tolist(), [3, 7, 11, 15])
+
+    def test_buckets_out_of_range(self):
+        index = self.index
+        self.assertEqual(index.buckets(2005, None).tolist(), [])
+        self.assertEqual(index.buckets(None, 2000).tolist(), [])
+        self.assertEqual(index.buckets(2003, 2002).tolist(), [])
+
+    def test_empty(self):
+        index = YearIndex.build(PublicationColumns())
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.buckets().tolist(), [])
+        self.assertEqual(index.buckets(2000, 2001, 1).tolist(), [])
+
+if __name__ == '__main__':
+    unittest.main()